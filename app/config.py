@@ -2,8 +2,9 @@
 Application configuration using Pydantic Settings.
 All environment variables are loaded here.
 """
-from pydantic_settings import BaseSettings
-from typing import List, Optional
+from functools import cached_property, lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import FrozenSet, List, Optional
 
 
 class Settings(BaseSettings):
@@ -20,12 +21,18 @@ class Settings(BaseSettings):
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "creativedoc"
     MONGODB_ATLAS_URL: Optional[str] = None
+    MONGODB_MAX_POOL_SIZE: int = 200
+    MONGODB_MIN_POOL_SIZE: int = 20
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 2000  # Fail fast instead of queueing behind a drained pool
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 3000
+    MONGODB_COMPRESSORS: str = "zstd,zlib"  # Wire compression, first one the server supports wins
     
     # Supabase Auth
     SUPABASE_URL: str
     SUPABASE_ANON_KEY: str
     SUPABASE_SERVICE_ROLE_KEY: str
     SUPABASE_JWT_SECRET: str
+    JWT_CACHE_TTL: int = 60  # Seconds a verified token's payload is reused (0 disables)
     
     # File Storage
     STORAGE_TYPE: str = "s3"  # s3 or r2
@@ -46,6 +53,11 @@ class Settings(BaseSettings):
     AI_FALLBACK_MODEL: str = "claude-3-sonnet-20240229"
     MAX_TOKENS_PER_CHUNK: int = 8000
     AI_TEMPERATURE: float = 0.3
+    AI_MAX_CONCURRENT_CHUNKS: int = 8
+    AI_CHUNKS_PER_BATCH: int = 4  # Chunks analyzed per AI request
+    AI_HEDGE_DELAY_MS: int = 0  # Also ask the fallback model if no answer by then (0 disables)
+    AI_RESPONSE_CACHE_TTL: int = 3600  # Seconds identical AI requests reuse a response (0 disables)
+    TEXT_CACHE_TTL: int = 7 * 24 * 3600  # Seconds extracted text is reused for identical files (0 disables)
     
     # Queue & Workers
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -81,29 +93,33 @@ class Settings(BaseSettings):
     
     # OCR
     TESSERACT_CMD: Optional[str] = None
+    OCR_WORKERS: int = 4  # Pages OCR'd in parallel
+    OCR_MIN_CONFIDENCE: float = 60  # Mean word confidence below which a page is re-read at higher DPI
     
     # Logging
     LOG_LEVEL: str = "INFO"
-    LOG_FILE: str = "logs/app.log"
+    LOG_FILE: Optional[str] = "logs/app.log"  # Empty disables file logging
+    LOG_TO_FILE: bool = True  # Set False where stdout is collected (e.g. containers)
     
     # Monitoring
     SENTRY_DSN: Optional[str] = None
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=True,
+    )
     
-    @property
+    @cached_property
     def cors_origins_list(self) -> List[str]:
         """Parse CORS origins from comma-separated string."""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
     
-    @property
-    def allowed_file_extensions(self) -> List[str]:
-        """Parse allowed file types from comma-separated string."""
-        return [ext.strip() for ext in self.ALLOWED_FILE_TYPES.split(",")]
+    @cached_property
+    def allowed_file_extensions(self) -> FrozenSet[str]:
+        """Parse allowed file types from comma-separated string (lowercased, for O(1) lookups)."""
+        return frozenset(ext.strip().lower() for ext in self.ALLOWED_FILE_TYPES.split(","))
     
-    @property
+    @cached_property
     def max_file_size_bytes(self) -> int:
         """Convert MB to bytes."""
         return self.MAX_FILE_SIZE_MB * 1024 * 1024
@@ -114,6 +130,17 @@ class Settings(BaseSettings):
         return self.MONGODB_ATLAS_URL or self.MONGODB_URL
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Get application settings (cached).
+    
+    The .env file is parsed and validated only once per process;
+    subsequent calls return the same instance.
+    """
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
 
@@ -1,40 +1,42 @@
 """
 FastAPI dependency injection for common dependencies.
 """
-from fastapi import Depends, HTTPException, Header
+from fastapi import Depends, HTTPException, Header, Request
 from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
-from app.config import settings
+from app.config import Settings, settings, get_settings
 from app.utils.errors import AuthenticationError
 from app.utils.security import get_user_id_from_token
 from app.models.user import User
 from app.services.supabase import SupabaseService
+from app.utils.cache import TTLCache
 
-# MongoDB connection (singleton)
-_mongodb_client: Optional[AsyncIOMotorClient] = None
-_mongodb_db: Optional[AsyncIOMotorDatabase] = None
+# Authenticated users: {user_id: User}, saves a MongoDB lookup per request
+_user_cache = TTLCache(maxsize=10_000, ttl=30)
 
 
-def get_mongodb_client() -> AsyncIOMotorClient:
-    """Get MongoDB client (singleton)."""
-    global _mongodb_client
-    
-    if _mongodb_client is None:
-        _mongodb_client = AsyncIOMotorClient(settings.mongodb_connection_string)
-    
-    return _mongodb_client
+async def settings_dep() -> Settings:
+    """Get cached application settings."""
+    return get_settings()
 
 
-def get_mongodb_db() -> AsyncIOMotorDatabase:
-    """Get MongoDB database instance."""
-    global _mongodb_db
-    
-    if _mongodb_db is None:
-        client = get_mongodb_client()
-        _mongodb_db = client[settings.MONGODB_DB_NAME]
-    
-    return _mongodb_db
+def create_mongodb_client() -> AsyncIOMotorClient:
+    """Create the MongoDB client (called once at application startup)."""
+    return AsyncIOMotorClient(
+        settings.mongodb_connection_string,
+        maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+        waitQueueTimeoutMS=settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        compressors=settings.MONGODB_COMPRESSORS,
+        tz_aware=True,
+    )
+
+
+async def get_mongodb_db(request: Request) -> AsyncIOMotorDatabase:
+    """Get MongoDB database instance created during application startup."""
+    return request.app.state.db
 
 
 async def get_current_user_id(
@@ -60,8 +62,11 @@ async def get_current_user_id(
     if not authorization:
         raise AuthenticationError("Missing authorization header")
     
+    if not authorization.startswith("Bearer "):
+        raise AuthenticationError("Authorization header must use Bearer scheme")
+    
     try:
-        user_id = get_user_id_from_token(authorization)
+        user_id = get_user_id_from_token(authorization[7:])
         return user_id
     except AuthenticationError:
         # Re-raise AuthenticationError as-is
@@ -89,14 +94,25 @@ async def get_current_user(
     """
     from app.models.user import User
     
+    # Each request gets its own copy, so edits never leak into the cache
+    user = _user_cache.get(user_id)
+    if user is not None:
+        return user.model_copy()
+    
     user = await User.get_by_id(db, user_id)
     if not user:
         raise AuthenticationError("User not found")
     
+    _user_cache.set(user_id, user.model_copy())
     return user
 
 
-def get_supabase_service() -> SupabaseService:
-    """Get Supabase service instance."""
-    return SupabaseService()
+def invalidate_cached_user(user_id: str) -> None:
+    """Drop cached user so the next request reloads it from the database."""
+    _user_cache.pop(user_id)
+
+
+async def get_supabase_service(request: Request) -> SupabaseService:
+    """Get Supabase service instance created during application startup."""
+    return request.app.state.supabase
 
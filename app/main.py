@@ -1,15 +1,22 @@
 """
 FastAPI application entry point.
 """
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
 from app.config import settings
+from app.dependencies import create_mongodb_client
+from app.models.document import Document
+from app.models.analysis import Analysis
+from app.models.billing import Subscription
+from app.models.user import User
+from app.services.supabase import SupabaseService
 from app.utils.logger import setup_logger
 from app.utils.errors import AppException
 from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.request_time import RequestTimeMiddleware
 from app.routes import (
     auth,
     upload,
@@ -33,10 +40,23 @@ async def lifespan(app: FastAPI):
     logger.info(f"MongoDB: {settings.MONGODB_DB_NAME}")
     logger.info(f"Storage: {settings.STORAGE_TYPE}")
     
+    # Connect to MongoDB once and fail fast if it's unreachable
+    app.state.mongo_client = create_mongodb_client()
+    app.state.db = app.state.mongo_client[settings.MONGODB_DB_NAME]
+    await app.state.db.command("ping")
+    await Document.ensure_indexes(app.state.db)
+    await Analysis.ensure_indexes(app.state.db)
+    await User.ensure_indexes(app.state.db)
+    await Subscription.ensure_indexes(app.state.db)
+    
+    app.state.supabase = SupabaseService()
+    
     yield
     
     # Shutdown
     logger.info("👋 CreativeDoc Backend shutting down...")
+    await app.state.supabase.close()
+    app.state.mongo_client.close()
 
 
 # Create FastAPI app
@@ -46,6 +66,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
+    openapi_url="/openapi.json" if settings.DEBUG else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan,
 )
 
@@ -62,12 +84,15 @@ app.add_middleware(
 if settings.ENVIRONMENT == "production":
     app.add_middleware(RateLimitMiddleware)
 
+# Per-request clock for model timestamps
+app.add_middleware(RequestTimeMiddleware)
+
 
 # Global exception handler
 @app.exception_handler(AppException)
 async def app_exception_handler(request, exc: AppException):
     """Handle custom application exceptions."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": exc.error_code,
@@ -81,7 +106,7 @@ async def app_exception_handler(request, exc: AppException):
 async def general_exception_handler(request, exc: Exception):
     """Handle unexpected exceptions."""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "INTERNAL_ERROR",
@@ -105,11 +130,17 @@ async def health_check():
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
-app.include_router(upload.router, prefix="/documents", tags=["Documents"])
+
+# Document-scoped routers share a single /documents mount. The collection
+# router is included directly since its list route has an empty path.
 app.include_router(documents.router, prefix="/documents", tags=["Documents"])
-app.include_router(status.router, prefix="/documents", tags=["Documents"])
-app.include_router(analyze.router, prefix="/documents", tags=["Analysis"])
-app.include_router(reports.router, prefix="/documents", tags=["Reports"])
+documents_router = APIRouter(prefix="/documents")
+documents_router.include_router(upload.router, tags=["Documents"])
+documents_router.include_router(status.router, tags=["Documents"])
+documents_router.include_router(analyze.router, tags=["Analysis"])
+documents_router.include_router(reports.router, tags=["Reports"])
+app.include_router(documents_router)
+
 app.include_router(billing.router, prefix="/billing", tags=["Billing"])
 
 
@@ -5,8 +5,8 @@ from fastapi import Request, HTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 import time
-from collections import defaultdict
-from typing import Dict, Tuple
+import uuid
+from redis import asyncio as aioredis
 
 from app.config import settings
 from app.utils.logger import setup_logger
@@ -15,34 +15,50 @@ logger = setup_logger(__name__)
 
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware using in-memory storage."""
+    """
+    Rate limiting middleware using Redis sorted sets.
+    
+    Each client IP maps to a sorted set of request timestamps, shared by
+    all workers, so the configured limits hold across processes.
+    """
+    
+    KEY_PREFIX = "rate_limit:"
+    
+    # Health checks and API docs are never rate limited
+    BYPASS_PATHS = frozenset({"/health", "/metrics", "/docs", "/redoc", "/openapi.json"})
     
     def __init__(self, app):
         super().__init__(app)
-        # In-memory storage: {ip: [(timestamp, endpoint), ...]}
-        self.requests: Dict[str, list] = defaultdict(list)
-        self.cleanup_interval = 60  # Clean up old entries every 60 seconds
-        self.last_cleanup = time.time()
+        self.redis = aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=False)
     
     async def dispatch(self, request: Request, call_next):
-        # Skip rate limiting for health checks
-        if request.url.path == "/health":
+        # Skip rate limiting for health checks and docs
+        if request.url.path in self.BYPASS_PATHS:
             return await call_next(request)
         
         # Get client IP
         client_ip = request.client.host if request.client else "unknown"
-        
-        # Clean up old entries periodically
+        key = f"{self.KEY_PREFIX}{client_ip}"
         current_time = time.time()
-        if current_time - self.last_cleanup > self.cleanup_interval:
-            self._cleanup_old_entries(current_time)
-            self.last_cleanup = current_time
+        member = f"{current_time}:{uuid.uuid4().hex}"
         
-        # Check rate limits
-        endpoint = request.url.path
+        # Trim, record and count in a single round trip
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zremrangebyscore(key, 0, current_time - 3600)
+                pipe.zadd(key, {member: current_time})
+                pipe.zcount(key, current_time - 60, "+inf")
+                pipe.zcard(key)
+                pipe.expire(key, 3600)
+                _, _, minute_count, hour_count, _ = await pipe.execute()
+        except Exception as e:
+            # Fail open: don't take the API down with the rate limiter
+            logger.warning(f"Rate limit check failed: {e}")
+            return await call_next(request)
         
         # Per-minute limit
-        if not self._check_limit(client_ip, endpoint, current_time, 60, settings.RATE_LIMIT_PER_MINUTE):
+        if minute_count > settings.RATE_LIMIT_PER_MINUTE:
+            await self._forget(key, member)
             return JSONResponse(
                 status_code=429,
                 content={
@@ -53,7 +69,8 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             )
         
         # Per-hour limit
-        if not self._check_limit(client_ip, endpoint, current_time, 3600, settings.RATE_LIMIT_PER_HOUR):
+        if hour_count > settings.RATE_LIMIT_PER_HOUR:
+            await self._forget(key, member)
             return JSONResponse(
                 status_code=429,
                 content={
@@ -63,36 +80,13 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 headers={"Retry-After": "3600"},
             )
         
-        # Record request
-        self.requests[client_ip].append((current_time, endpoint))
-        
         # Process request
         response = await call_next(request)
         return response
     
-    def _check_limit(self, client_ip: str, endpoint: str, current_time: float, window: int, limit: int) -> bool:
-        """Check if request is within rate limit."""
-        window_start = current_time - window
-        
-        # Filter requests within window
-        recent_requests = [
-            ts for ts, ep in self.requests[client_ip]
-            if ts > window_start
-        ]
-        
-        return len(recent_requests) < limit
-    
-    def _cleanup_old_entries(self, current_time: float):
-        """Remove entries older than 1 hour."""
-        cutoff = current_time - 3600
-        
-        for ip in list(self.requests.keys()):
-            self.requests[ip] = [
-                (ts, ep) for ts, ep in self.requests[ip]
-                if ts > cutoff
-            ]
-            
-            # Remove empty entries
-            if not self.requests[ip]:
-                del self.requests[ip]
-
+    async def _forget(self, key: str, member: str):
+        """Remove a rejected request so it doesn't count against the client."""
+        try:
+            await self.redis.zrem(key, member)
+        except Exception as e:
+            logger.warning(f"Failed to remove rejected request from rate limit: {e}")
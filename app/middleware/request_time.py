@@ -0,0 +1,18 @@
+"""
+Request clock middleware.
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.clock import set_request_now
+
+
+class RequestTimeMiddleware:
+    """Capture one timestamp per request for use by model writes."""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            set_request_now()
+        await self.app(scope, receive, send)
@@ -1,28 +1,51 @@
 """
 Analysis MongoDB model for AI analysis results.
 """
-from typing import Optional, List, Dict, Any
+import asyncio
+from collections import Counter
+from typing import ClassVar, Optional, List, Dict, Any, Literal
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator, model_validator
+from pydantic.dataclasses import dataclass
 from bson import ObjectId
 
+from app.utils.clock import utc_now
 
-class Party(BaseModel):
+
+# Other severity words the AI uses, mapped onto the three known levels;
+# anything else counts as low, as unknown severities always scored
+_SEVERITY_ALIASES = {
+    "critical": "high",
+    "severe": "high",
+    "major": "high",
+    "moderate": "medium",
+    "med": "medium",
+    "minor": "low",
+}
+_SEVERITIES = {"high", "medium", "low"}
+
+
+# Leaf value objects are created in bulk per analysis: slotted, frozen
+# dataclasses are smaller and cheaper to build than BaseModel instances
+@dataclass(frozen=True, slots=True)
+class Party:
     """Party involved in document."""
     name: str
     role: str
     contact: Optional[str] = None
 
 
-class DateItem(BaseModel):
+@dataclass(frozen=True, slots=True)
+class DateItem:
     """Important date in document."""
     type: str  # e.g., "Start Date", "Deadline", "Termination Date"
     date: str  # ISO format date string
     description: Optional[str] = None
 
 
-class FinancialTerm(BaseModel):
+@dataclass(frozen=True, slots=True)
+class FinancialTerm:
     """Financial term extracted from document."""
     type: str  # e.g., "Salary", "Payment", "Penalty"
     amount: float
@@ -30,21 +53,34 @@ class FinancialTerm(BaseModel):
     frequency: Optional[str] = None  # e.g., "annual", "monthly"
 
 
-class Obligation(BaseModel):
+@dataclass(frozen=True, slots=True)
+class Obligation:
     """Obligation of a party."""
     party: str
     obligation: str
     deadline: Optional[str] = None
 
 
-class RiskItem(BaseModel):
+@dataclass(frozen=True, slots=True)
+class RiskItem:
     """Risk identified in document."""
-    severity: str  # "high", "medium", "low"
+    severity: Literal["high", "medium", "low"]
     title: str
     description: str
     recommendation: Optional[str] = None
     page_reference: Optional[int] = None
     clause_name: Optional[str] = None
+    
+    @field_validator("severity", mode="before")
+    @classmethod
+    def normalize_severity(cls, value: Any) -> str:
+        """
+        Accept AI output like "High", " medium " or "critical", so one odd
+        severity can't fail a whole analysis (or an already stored one).
+        """
+        severity = value.strip().lower() if isinstance(value, str) else ""
+        severity = _SEVERITY_ALIASES.get(severity, severity)
+        return severity if severity in _SEVERITIES else "low"
 
 
 class Analysis(BaseModel):
@@ -67,6 +103,7 @@ class Analysis(BaseModel):
     risks: List[RiskItem] = Field(default_factory=list)
     missing_clauses: List[str] = Field(default_factory=list)
     unusual_terms: List[str] = Field(default_factory=list)
+    risk_summary: Dict[str, int] = Field(default_factory=dict, description="Risk count by severity")
     
     # Timeline
     timeline: List[Dict[str, Any]] = Field(default_factory=list)
@@ -77,10 +114,11 @@ class Analysis(BaseModel):
     processing_time: int = Field(default=0, description="Processing time in seconds")
     cost_estimate: float = Field(default=0.0, description="Estimated cost in USD")
     
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra={
             "example": {
                 "analysis_id": "507f1f77bcf86cd799439011",
                 "document_id": "507f1f77bcf86cd799439012",
@@ -91,7 +129,26 @@ class Analysis(BaseModel):
                 "ai_model_used": "gpt-5.1",
                 "tokens_used": 15000,
             }
-        }
+        },
+    )
+    
+    # Built once: validating a whole list in pydantic-core beats one
+    # constructor call per item
+    _NESTED_FIELDS: ClassVar[Dict[str, TypeAdapter]] = {
+        "parties": TypeAdapter(List[Party]),
+        "dates": TypeAdapter(List[DateItem]),
+        "financial_terms": TypeAdapter(List[FinancialTerm]),
+        "obligations": TypeAdapter(List[Obligation]),
+        "risks": TypeAdapter(List[RiskItem]),
+    }
+    
+    # Nested item count above which write serialization leaves the event loop
+    _THREAD_DUMP_THRESHOLD: ClassVar[int] = 200
+    
+    @classmethod
+    async def ensure_indexes(cls, db: AsyncIOMotorDatabase) -> None:
+        """Create indexes backing analysis lookups."""
+        await db.analyses.create_index([("document_id", 1), ("user_id", 1)])
     
     @classmethod
     async def get_by_document_id(cls, db: AsyncIOMotorDatabase, document_id: str, user_id: Optional[str] = None) -> Optional["Analysis"]:
@@ -101,36 +158,63 @@ class Analysis(BaseModel):
         if user_id:
             query["user_id"] = user_id
         
-        doc = await collection.find_one(query)
+        doc = await collection.find_one(query, projection={"_id": 0})
         if doc:
-            doc.pop("_id", None)
-            return cls(**doc)
+            return cls._from_db(doc)
         return None
     
+    @classmethod
+    def _from_db(cls, doc: dict) -> "Analysis":
+        """
+        Build an analysis from a stored record without re-validating it.
+        
+        model_construct leaves nested values as dicts, so the leaf
+        dataclasses are rebuilt explicitly.
+        """
+        for field, adapter in cls._NESTED_FIELDS.items():
+            if field in doc:
+                doc[field] = adapter.validate_python(doc[field])
+        return cls.model_construct(**doc)
+    
     @classmethod
     async def create(cls, db: AsyncIOMotorDatabase, analysis_data: dict) -> "Analysis":
         """Create new analysis."""
         collection = db.analyses
         analysis = cls(**analysis_data)
-        await collection.insert_one(analysis.model_dump())
+        # Store the ID as Mongo's native 12-byte _id too, so new records can be
+        # looked up through the default _id index once old ones are backfilled
+        await collection.insert_one({"_id": ObjectId(analysis.analysis_id), **await analysis._dump()})
         return analysis
     
     async def save(self, db: AsyncIOMotorDatabase) -> "Analysis":
-        """Save analysis to database."""
+        """Save analysis to database (None-valued fields are left untouched)."""
         collection = db.analyses
         await collection.update_one(
             {"analysis_id": self.analysis_id},
-            {"$set": self.model_dump()},
+            {"$set": await self._dump(exclude_none=True)},
             upsert=True,
         )
         return self
     
+    async def _dump(self, **kwargs) -> dict:
+        """Dump for a database write, in a worker thread when the analysis is large."""
+        item_count = sum(len(getattr(self, field)) for field in self._NESTED_FIELDS)
+        if item_count > self._THREAD_DUMP_THRESHOLD:
+            return await asyncio.to_thread(self.model_dump, **kwargs)
+        return self.model_dump(**kwargs)
+    
+    @model_validator(mode="after")
+    def fill_risk_summary(self) -> "Analysis":
+        """Count risks once so reads don't have to."""
+        if not self.risk_summary:
+            self.risk_summary = self._count_risks()
+        return self
+    
+    def _count_risks(self) -> Dict[str, int]:
+        """Count risks by severity."""
+        counts = Counter(risk.severity.lower() for risk in self.risks)
+        return {"high": counts["high"], "medium": counts["medium"], "low": counts["low"]}
+    
     def get_risk_summary(self) -> Dict[str, int]:
         """Get risk count by severity."""
-        summary = {"high": 0, "medium": 0, "low": 0}
-        for risk in self.risks:
-            severity = risk.severity.lower()
-            if severity in summary:
-                summary[severity] += 1
-        return summary
-
+        return self.risk_summary or self._count_risks()
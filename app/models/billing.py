@@ -2,9 +2,11 @@
 Billing and subscription MongoDB model.
 """
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.utils.clock import utc_now
 
 
 class Subscription(BaseModel):
@@ -18,11 +20,12 @@ class Subscription(BaseModel):
     current_period_start: datetime
     current_period_end: datetime
     cancel_at_period_end: bool = Field(default=False)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra={
             "example": {
                 "user_id": "550e8400-e29b-41d4-a716-446655440000",
                 "stripe_customer_id": "cus_...",
@@ -32,7 +35,20 @@ class Subscription(BaseModel):
                 "current_period_start": "2025-01-01T00:00:00Z",
                 "current_period_end": "2025-02-01T00:00:00Z",
             }
-        }
+        },
+    )
+    
+    @classmethod
+    async def ensure_indexes(cls, db: AsyncIOMotorDatabase) -> None:
+        """Create indexes backing subscription lookups."""
+        collection = db.subscriptions
+        await collection.create_index("user_id")
+        await collection.create_index("stripe_subscription_id")
+    
+    @staticmethod
+    def cache_key(user_id: str) -> str:
+        """Shared cache key for a user's subscription."""
+        return f"sub:{user_id}"
     
     @classmethod
     async def get_by_user_id(cls, db: AsyncIOMotorDatabase, user_id: str) -> Optional["Subscription"]:
@@ -54,6 +70,31 @@ class Subscription(BaseModel):
             return cls(**doc)
         return None
     
+    @classmethod
+    async def get_owner_and_plan(cls, db: AsyncIOMotorDatabase, stripe_subscription_id: str) -> Optional[dict]:
+        """Get only a subscription's user_id and plan, as a raw dict."""
+        collection = db.subscriptions
+        return await collection.find_one(
+            {"stripe_subscription_id": stripe_subscription_id},
+            projection={"_id": 0, "user_id": 1, "plan": 1},
+        )
+    
+    @classmethod
+    async def update_fields(cls, db: AsyncIOMotorDatabase, stripe_subscription_id: str, **fields) -> Optional[str]:
+        """
+        Set fields on a subscription by Stripe subscription ID, without loading it.
+        
+        Returns:
+            Owner user ID, or None if the subscription doesn't exist
+        """
+        collection = db.subscriptions
+        doc = await collection.find_one_and_update(
+            {"stripe_subscription_id": stripe_subscription_id},
+            {"$set": {**fields, "updated_at": utc_now()}},
+            projection={"_id": 0, "user_id": 1},
+        )
+        return doc["user_id"] if doc else None
+    
     @classmethod
     async def create(cls, db: AsyncIOMotorDatabase, subscription_data: dict) -> "Subscription":
         """Create new subscription."""
@@ -63,17 +104,38 @@ class Subscription(BaseModel):
         return subscription
     
     async def save(self, db: AsyncIOMotorDatabase) -> "Subscription":
-        """Save subscription to database."""
+        """Save subscription to database (None-valued fields are left untouched)."""
         collection = db.subscriptions
-        self.updated_at = datetime.utcnow()
+        self.updated_at = utc_now()
         await collection.update_one(
             {"user_id": self.user_id},
-            {"$set": self.model_dump()},
+            {"$set": self.model_dump(exclude_none=True)},
             upsert=True,
         )
         return self
     
+    async def _patch(self, db: AsyncIOMotorDatabase, fields: dict) -> None:
+        """Write only the given fields instead of the whole subscription."""
+        collection = db.subscriptions
+        await collection.update_one(
+            {"user_id": self.user_id},
+            {"$set": fields},
+        )
+    
+    async def update(self, db: AsyncIOMotorDatabase, **fields) -> "Subscription":
+        """Set the given fields, writing only those (and updated_at)."""
+        fields["updated_at"] = utc_now()
+        for name, value in fields.items():
+            setattr(self, name, value)
+        
+        await self._patch(db, fields)
+        return self
+    
     def is_active(self) -> bool:
         """Check if subscription is active."""
-        return self.status == "active" and datetime.utcnow() < self.current_period_end
+        period_end = self.current_period_end
+        if period_end.tzinfo is None:
+            # Records written before timestamps were timezone-aware
+            period_end = period_end.replace(tzinfo=timezone.utc)
+        return self.status == "active" and utc_now() < period_end
 
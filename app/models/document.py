@@ -1,17 +1,21 @@
 """
 Document MongoDB model.
 """
-from typing import Optional, Literal
+from enum import Enum
+from typing import ClassVar, Iterable, Optional, Literal
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from pymongo import ReturnDocument
 from bson import ObjectId
 
+from app.utils.clock import utc_now
 from app.utils.errors import NotFoundError
 
 
-class DocumentStatus(str):
+class DocumentStatus(str, Enum):
     """Document processing status."""
+    UPLOADING = "uploading"
     UPLOADED = "uploaded"
     PARSING = "parsing"
     WAITING_IN_QUEUE = "waiting_in_queue"
@@ -21,7 +25,7 @@ class DocumentStatus(str):
     FAILED = "failed"
 
 
-class DocumentType(str):
+class DocumentType(str, Enum):
     """Document type."""
     CONTRACT = "contract"
     NDA = "nda"
@@ -40,20 +44,22 @@ class Document(BaseModel):
     file_url: str = Field(..., description="S3/R2 file URL")
     file_type: str = Field(..., description="File extension: pdf, docx, txt")
     file_size: int = Field(..., description="File size in bytes")
-    document_type: str = Field(default="other", description="Document type: contract, nda, employment, etc.")
-    status: str = Field(default=DocumentStatus.UPLOADED, description="Processing status")
+    document_type: DocumentType = Field(default=DocumentType.OTHER, validate_default=True, description="Document type: contract, nda, employment, etc.")
+    status: DocumentStatus = Field(default=DocumentStatus.UPLOADED, validate_default=True, description="Processing status")
     risk_score: Optional[int] = Field(None, ge=0, le=10, description="Overall risk score (0-10)")
-    upload_date: datetime = Field(default_factory=datetime.utcnow)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    upload_date: datetime = Field(default_factory=utc_now)
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
     processing_started_at: Optional[datetime] = None
     processing_completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
     language: Optional[str] = Field(default="en", description="Document language code")
     notes: Optional[str] = None
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        defer_build=True,
+        use_enum_values=True,
+        json_schema_extra={
             "example": {
                 "document_id": "507f1f77bcf86cd799439011",
                 "user_id": "550e8400-e29b-41d4-a716-446655440000",
@@ -66,7 +72,41 @@ class Document(BaseModel):
                 "risk_score": 7,
                 "upload_date": "2025-01-15T12:00:00Z",
             }
-        }
+        },
+    )
+    
+    # Leave out Mongo's internal _id when loading documents
+    _PROJECTION: ClassVar[dict] = {"_id": 0}
+    _STATUS_PROJECTION: ClassVar[dict] = {
+        "_id": 0,
+        "document_id": 1,
+        "status": 1,
+        "error_message": 1,
+        "processing_started_at": 1,
+        "processing_completed_at": 1,
+    }
+    # Fields shown in document lists
+    _BRIEF_PROJECTION: ClassVar[dict] = {
+        "_id": 0,
+        "document_id": 1,
+        "name": 1,
+        "file_type": 1,
+        "file_size": 1,
+        "document_type": 1,
+        "status": 1,
+        "risk_score": 1,
+        "created_at": 1,
+    }
+    
+    @classmethod
+    async def ensure_indexes(cls, db: AsyncIOMotorDatabase) -> None:
+        """Create indexes backing document lookups and per-user listing queries."""
+        collection = db.documents
+        await collection.create_index("document_id", unique=True)
+        await collection.create_index([("user_id", 1), ("created_at", -1)])
+        await collection.create_index([("user_id", 1), ("status", 1), ("created_at", -1)])
+        await collection.create_index([("user_id", 1), ("document_type", 1), ("created_at", -1)])
+        await collection.create_index([("user_id", 1), ("document_type", 1), ("status", 1), ("created_at", -1)])
     
     @classmethod
     async def get_by_id(cls, db: AsyncIOMotorDatabase, document_id: str, user_id: Optional[str] = None) -> Optional["Document"]:
@@ -76,44 +116,119 @@ class Document(BaseModel):
         if user_id:
             query["user_id"] = user_id
         
-        doc = await collection.find_one(query)
+        doc = await collection.find_one(query, projection=cls._PROJECTION)
         if doc:
-            doc.pop("_id", None)
-            return cls(**doc)
+            # Stored documents were validated on write
+            return cls.model_construct(**doc)
         return None
     
+    @classmethod
+    async def get_status_fields(cls, db: AsyncIOMotorDatabase, document_id: str, user_id: str) -> Optional[dict]:
+        """Get only a user's document processing status fields, as a raw dict."""
+        collection = db.documents
+        return await collection.find_one(
+            {"document_id": document_id, "user_id": user_id},
+            projection=cls._STATUS_PROJECTION,
+        )
+    
     @classmethod
     async def create(cls, db: AsyncIOMotorDatabase, document_data: dict) -> "Document":
         """Create new document."""
         collection = db.documents
         document = cls(**document_data)
-        await collection.insert_one(document.model_dump())
+        # Store the ID as Mongo's native 12-byte _id too, so new records can be
+        # looked up through the default _id index once old ones are backfilled
+        await collection.insert_one({"_id": ObjectId(document.document_id), **document.model_dump()})
         return document
     
     async def save(self, db: AsyncIOMotorDatabase) -> "Document":
-        """Save document to database."""
+        """Save document to database (None-valued fields are left untouched)."""
         collection = db.documents
-        self.updated_at = datetime.utcnow()
+        self.updated_at = utc_now()
         await collection.update_one(
             {"document_id": self.document_id},
-            {"$set": self.model_dump()},
+            {"$set": self.model_dump(exclude_none=True)},
             upsert=True,
         )
         return self
     
-    async def update_status(self, db: AsyncIOMotorDatabase, status: str, error_message: Optional[str] = None) -> "Document":
-        """Update document status."""
+    async def _patch(self, db: AsyncIOMotorDatabase, fields: dict) -> None:
+        """Write only the given fields instead of the whole document."""
+        collection = db.documents
+        await collection.update_one(
+            {"document_id": self.document_id},
+            {"$set": fields},
+        )
+    
+    async def update_status(
+        self,
+        db: AsyncIOMotorDatabase,
+        status: str,
+        error_message: Optional[str] = None,
+        risk_score: Optional[int] = None,
+    ) -> "Document":
+        """Update document status (and risk score, once analysis completes)."""
+        status = DocumentStatus(status).value
+        now = utc_now()
         self.status = status
         self.error_message = error_message
+        self.updated_at = now
+        fields = {"status": status, "error_message": error_message, "updated_at": now}
+        
         if status == DocumentStatus.PROCESSING and not self.processing_started_at:
-            self.processing_started_at = datetime.utcnow()
+            self.processing_started_at = now
+            fields["processing_started_at"] = now
         elif status in [DocumentStatus.COMPLETED, DocumentStatus.FAILED]:
-            self.processing_completed_at = datetime.utcnow()
-        await self.save(db)
+            self.processing_completed_at = now
+            fields["processing_completed_at"] = now
+        
+        if risk_score is not None:
+            self.risk_score = risk_score
+            fields["risk_score"] = risk_score
+        
+        await self._patch(db, fields)
         return self
     
     @classmethod
-    async def list_by_user(
+    async def claim_status(
+        cls,
+        db: AsyncIOMotorDatabase,
+        document_id: str,
+        user_id: str,
+        status: str,
+        unless_status: Iterable[str],
+        **fields,
+    ) -> Optional["Document"]:
+        """
+        Atomically move a user's document to status, setting any other
+        given fields in the same update.
+        
+        Returns:
+            Updated document, or None if it doesn't exist or its current
+            status is one of unless_status
+        """
+        collection = db.documents
+        doc = await collection.find_one_and_update(
+            {
+                "document_id": document_id,
+                "user_id": user_id,
+                "status": {"$nin": [DocumentStatus(s).value for s in unless_status]},
+            },
+            {"$set": {
+                "status": DocumentStatus(status).value,
+                "error_message": None,
+                "updated_at": utc_now(),
+                **fields,
+            }},
+            projection=cls._PROJECTION,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc:
+            return cls.model_construct(**doc)
+        return None
+    
+    @classmethod
+    async def list_brief_and_count_by_user(
         cls,
         db: AsyncIOMotorDatabase,
         user_id: str,
@@ -121,8 +236,30 @@ class Document(BaseModel):
         limit: int = 20,
         document_type: Optional[str] = None,
         status: Optional[str] = None,
-    ) -> list["Document"]:
-        """List documents for a user with filters."""
+    ) -> tuple[list[dict], int]:
+        """
+        List a page of a user's documents, only the fields a document list
+        shows, as raw dicts, together with the total count.
+        
+        Both come from a single $facet aggregation, so the filter runs
+        once and the page costs one round trip.
+        """
+        return await cls._page_and_count(
+            db, user_id, skip, limit, document_type, status, cls._BRIEF_PROJECTION
+        )
+    
+    @classmethod
+    async def _page_and_count(
+        cls,
+        db: AsyncIOMotorDatabase,
+        user_id: str,
+        skip: int,
+        limit: int,
+        document_type: Optional[str],
+        status: Optional[str],
+        projection: dict,
+    ) -> tuple[list[dict], int]:
+        """Run the $facet page-and-count aggregation with the given projection."""
         collection = db.documents
         query = {"user_id": user_id}
         
@@ -131,13 +268,24 @@ class Document(BaseModel):
         if status:
             query["status"] = status
         
-        cursor = collection.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        documents = []
-        async for doc in cursor:
-            doc.pop("_id", None)
-            documents.append(cls(**doc))
+        pipeline = [
+            {"$match": query},
+            {
+                "$facet": {
+                    "documents": [
+                        {"$sort": {"created_at": -1}},
+                        {"$skip": skip},
+                        {"$limit": limit},
+                        {"$project": projection},
+                    ],
+                    "total": [{"$count": "n"}],
+                }
+            },
+        ]
+        result = await collection.aggregate(pipeline).next()
         
-        return documents
+        total = result["total"][0]["n"] if result["total"] else 0
+        return result["documents"], total
     
     @classmethod
     async def count_by_user(
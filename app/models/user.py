@@ -4,10 +4,21 @@ User MongoDB model.
 from typing import Optional
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from pydantic import BaseModel, EmailStr, Field
+from pymongo import ReturnDocument
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
+from app.utils.clock import utc_now
 from app.utils.errors import NotFoundError
 
+# Monthly document limits per plan (-1 means unlimited)
+_PLAN_LIMITS = {
+    "starter": 20,
+    "professional": 100,
+    "enterprise": -1,
+}
+_DEFAULT_PLAN_LIMIT = 20
+_UNLIMITED_PLANS = [plan for plan, limit in _PLAN_LIMITS.items() if limit < 0]
+
 
 class User(BaseModel):
     """User model for MongoDB."""
@@ -18,13 +29,14 @@ class User(BaseModel):
     avatar_url: Optional[str] = None
     plan: str = Field(default="starter", description="Subscription plan: starter, professional, enterprise")
     credits_remaining: int = Field(default=0, description="Document analysis credits remaining")
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
     last_login: Optional[datetime] = None
     company_name: Optional[str] = None
     job_title: Optional[str] = None
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra={
             "example": {
                 "user_id": "550e8400-e29b-41d4-a716-446655440000",
                 "email": "lawyer@example.com",
@@ -33,18 +45,43 @@ class User(BaseModel):
                 "credits_remaining": 75,
                 "created_at": "2025-01-15T12:00:00Z",
             }
-        }
+        },
+    )
+    
+    @classmethod
+    async def ensure_indexes(cls, db: AsyncIOMotorDatabase) -> None:
+        """Create the index backing user lookups."""
+        await db.users.create_index("user_id", unique=True)
     
     @classmethod
     async def get_by_id(cls, db: AsyncIOMotorDatabase, user_id: str) -> Optional["User"]:
         """Get user by ID."""
         collection = db.users
-        doc = await collection.find_one({"user_id": user_id})
+        doc = await collection.find_one({"user_id": user_id}, projection={"_id": 0})
         if doc:
-            doc.pop("_id", None)
-            return cls(**doc)
+            # Stored users were validated on write
+            return cls.model_construct(**doc)
         return None
     
+    @classmethod
+    async def get_plan(cls, db: AsyncIOMotorDatabase, user_id: str) -> Optional[str]:
+        """Get only a user's plan (None if the user doesn't exist)."""
+        collection = db.users
+        doc = await collection.find_one({"user_id": user_id}, projection={"_id": 0, "plan": 1})
+        if doc:
+            return doc.get("plan", "starter")
+        return None
+    
+    @staticmethod
+    def plan_cache_key(user_id: str) -> str:
+        """Shared cache key for a user's plan."""
+        return f"user:{user_id}:plan"
+    
+    @staticmethod
+    def monthly_limit_for(plan: str) -> int:
+        """Get monthly document limit for a plan (-1 means unlimited)."""
+        return _PLAN_LIMITS.get(plan, _DEFAULT_PLAN_LIMIT)
+    
     @classmethod
     async def create(cls, db: AsyncIOMotorDatabase, user_data: dict) -> "User":
         """Create new user."""
@@ -58,40 +95,105 @@ class User(BaseModel):
         collection = db.users
         await collection.update_one(
             {"user_id": self.user_id},
-            {"$set": self.model_dump()},
+            {"$set": self.model_dump(exclude={"user_id"}, exclude_unset=True)},
             upsert=True,
         )
         return self
     
     async def update_credits(self, db: AsyncIOMotorDatabase, credits: int) -> "User":
-        """Update user credits."""
-        self.credits_remaining = max(0, self.credits_remaining + credits)
-        await self.save(db)
+        """Update user credits (atomically, never going below zero)."""
+        collection = db.users
+        doc = await collection.find_one_and_update(
+            {"user_id": self.user_id},
+            [{"$set": {"credits_remaining": {"$max": [0, {"$add": ["$credits_remaining", credits]}]}}}],
+            projection={"_id": 0, "credits_remaining": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc:
+            self.credits_remaining = doc["credits_remaining"]
         return self
     
+    async def update_plan(self, db: AsyncIOMotorDatabase, plan: str, credits: Optional[int] = None) -> "User":
+        """Set plan (and optionally credits) in one targeted update."""
+        collection = db.users
+        self.plan = plan
+        fields = {"plan": plan}
+        
+        if credits is not None:
+            self.credits_remaining = credits
+            fields["credits_remaining"] = credits
+        
+        await collection.update_one({"user_id": self.user_id}, {"$set": fields})
+        return self
+    
+    @classmethod
+    async def set_credits(cls, db: AsyncIOMotorDatabase, user_id: str, credits: int) -> bool:
+        """
+        Set a user's credits without loading the user first.
+        
+        Returns:
+            True if the user exists
+        """
+        collection = db.users
+        result = await collection.update_one(
+            {"user_id": user_id},
+            {"$set": {"credits_remaining": credits}},
+        )
+        return result.matched_count > 0
+    
     async def consume_credit(self, db: AsyncIOMotorDatabase) -> bool:
         """
         Consume one credit if available.
         
+        The decrement is a single atomic update, so concurrent uploads
+        can't spend the same credit twice.
+        
         Returns:
             True if credit consumed, False if insufficient credits
         """
-        if self.credits_remaining <= 0:
+        collection = db.users
+        result = await collection.update_one(
+            {"user_id": self.user_id, "credits_remaining": {"$gt": 0}},
+            {"$inc": {"credits_remaining": -1}},
+        )
+        if result.modified_count == 0:
             return False
         
         self.credits_remaining -= 1
-        await self.save(db)
         return True
     
+    @classmethod
+    async def try_consume_credit(cls, db: AsyncIOMotorDatabase, user_id: str) -> Optional[int]:
+        """
+        Atomically take one credit from a user on a limited plan.
+        
+        Returns:
+            Credits remaining after the decrement, or None if no credit was
+            taken (unknown user, unlimited plan, or no credits left)
+        """
+        collection = db.users
+        doc = await collection.find_one_and_update(
+            {
+                "user_id": user_id,
+                "plan": {"$nin": _UNLIMITED_PLANS},
+                "credits_remaining": {"$gt": 0},
+            },
+            {"$inc": {"credits_remaining": -1}},
+            projection={"_id": 0, "credits_remaining": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc["credits_remaining"] if doc else None
+    
+    @classmethod
+    async def refund_credit(cls, db: AsyncIOMotorDatabase, user_id: str) -> None:
+        """Give back a credit taken by try_consume_credit."""
+        collection = db.users
+        await collection.update_one({"user_id": user_id}, {"$inc": {"credits_remaining": 1}})
+    
     def get_plan_limits(self) -> dict:
         """Get document limits for current plan."""
-        limits = {
-            "starter": 20,
-            "professional": 100,
-            "enterprise": -1,  # Unlimited
-        }
         return {
-            "monthly_limit": limits.get(self.plan, 20),
+            "monthly_limit": self.monthly_limit_for(self.plan),
             "credits_remaining": self.credits_remaining,
         }
 
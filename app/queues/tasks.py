@@ -1,13 +1,16 @@
 """
 Celery tasks for async document processing.
 """
+import asyncio
 import time
 from datetime import datetime
-from motor.motor_asyncio import AsyncIOMotorClient
+from typing import Optional, Tuple
+from celery.signals import worker_process_init, worker_process_shutdown  # pyright: ignore[reportMissingImports]
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from app.queues.worker import celery_app
 from app.config import settings
 from app.models.document import Document, DocumentStatus
-from app.models.analysis import Analysis, Party, DateItem, FinancialTerm, Obligation, RiskItem
+from app.models.analysis import Analysis
 from app.services.storage import StorageService
 from app.services.pdf_parser import PDFParser
 from app.services.docx_parser import DOCXParser
@@ -16,12 +19,70 @@ from app.services.chunker import DocumentChunker
 from app.services.ai_engine import AIEngine
 from app.services.risk_engine import RiskEngine
 from app.services.emailer import EmailService
+from app.services.cache import cache
+from app.services.text_cache import TextCache, text_cache
 from app.models.user import User
 from app.models.billing import Subscription
 from app.utils.logger import setup_logger
 
+try:
+    import uvloop
+except ImportError:  # Not available on Windows
+    uvloop = None
+
 logger = setup_logger(__name__)
 
+# Per-worker-process event loop and MongoDB client, reused across tasks.
+# Motor binds to the loop it is first used on, so both must live together.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_mongo_client: Optional[AsyncIOMotorClient] = None
+
+
+def _run(coro):
+    """Run a coroutine on this worker process's persistent event loop."""
+    global _loop
+    
+    if _loop is None or _loop.is_closed():
+        _loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    
+    return _loop.run_until_complete(coro)
+
+
+def _get_db() -> AsyncIOMotorDatabase:
+    """Get MongoDB database for this worker process (singleton client)."""
+    global _mongo_client
+    
+    if _mongo_client is None:
+        _mongo_client = AsyncIOMotorClient(
+            settings.mongodb_connection_string,
+            maxPoolSize=50,
+            serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            compressors=settings.MONGODB_COMPRESSORS,
+            tz_aware=True,
+        )
+    
+    return _mongo_client[settings.MONGODB_DB_NAME]
+
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs):
+    """Create the MongoDB client once the worker process has forked."""
+    _get_db()
+
+
+@worker_process_shutdown.connect
+def _shutdown_worker_process(**kwargs):
+    """Close the MongoDB client and event loop."""
+    global _mongo_client, _loop
+    
+    if _mongo_client is not None:
+        _mongo_client.close()
+        _mongo_client = None
+    if _loop is not None and not _loop.is_closed():
+        _loop.close()
+        _loop = None
+
 
 @celery_app.task(bind=True, max_retries=3)
 def process_document_analysis(self, document_id: str, user_id: str):
@@ -37,10 +98,39 @@ def process_document_analysis(self, document_id: str, user_id: str):
     6. Calculates risk scores
     7. Saves analysis to database
     """
-    import asyncio
-    
     # Run async function
-    return asyncio.run(_process_document_analysis_async(document_id, user_id, self))
+    return _run(_process_document_analysis_async(document_id, user_id, self))
+
+
+async def _extract_text(file_type: str, file_content: bytes) -> Tuple[str, bool]:
+    """
+    Extract text from a downloaded file.
+    
+    Returns:
+        Extracted text, and whether it is worth caching (False for a scanned
+        PDF read without OCR)
+    """
+    logger.info(f"Extracting text from {file_type} file")
+    if file_type == "pdf":
+        # Extract, and check if scanned from the same pass
+        pdf_parser = PDFParser()
+        text, is_scanned = await pdf_parser.extract_text_with_meta(file_content)
+        
+        if is_scanned:
+            logger.info("PDF appears to be scanned, using OCR")
+            ocr = OCRService()
+            if ocr.is_available():
+                return await ocr.extract_text_from_pdf(file_content), True
+            logger.warning("OCR not available, using regular PDF extraction")
+            return text, False
+        return text, True
+    elif file_type == "docx":
+        docx_parser = DOCXParser()
+        return await docx_parser.extract_text(file_content), True
+    elif file_type == "txt":
+        return file_content.decode("utf-8"), True
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
 
 
 async def _process_document_analysis_async(document_id: str, user_id: str, task_instance):
@@ -48,8 +138,7 @@ async def _process_document_analysis_async(document_id: str, user_id: str, task_
     start_time = time.time()
     
     # Get MongoDB connection
-    client = AsyncIOMotorClient(settings.mongodb_connection_string)
-    db = client[settings.MONGODB_DB_NAME]
+    db = _get_db()
     
     try:
         # Get document
@@ -58,38 +147,29 @@ async def _process_document_analysis_async(document_id: str, user_id: str, task_
             logger.error(f"Document not found: {document_id}")
             return
         
-        # Update status to processing
-        await document.update_status(db, DocumentStatus.PROCESSING)
-        
-        # Download file from storage
+        # Download file from storage, while the status update goes to Mongo
         storage = StorageService()
         file_key = storage.extract_file_key_from_url(document.file_url)
-        file_content = await storage.download_file(file_key)
-        
-        # Extract text based on file type
-        logger.info(f"Extracting text from {document.file_type} file")
-        if document.file_type == "pdf":
-            # Check if scanned
-            pdf_parser = PDFParser()
-            is_scanned = await pdf_parser.is_scanned(file_content)
-            
-            if is_scanned:
-                logger.info("PDF appears to be scanned, using OCR")
-                ocr = OCRService()
-                if ocr.is_available():
-                    text = await ocr.extract_text_from_pdf(file_content)
-                else:
-                    logger.warning("OCR not available, using regular PDF extraction")
-                    text = await pdf_parser.extract_text(file_content)
-            else:
-                text = await pdf_parser.extract_text(file_content)
-        elif document.file_type == "docx":
-            docx_parser = DOCXParser()
-            text = await docx_parser.extract_text(file_content)
-        elif document.file_type == "txt":
-            text = file_content.decode("utf-8")
+        download = asyncio.create_task(storage.download_file(file_key))
+        
+        # Update status to processing
+        try:
+            await document.update_status(db, DocumentStatus.PROCESSING)
+        except BaseException:
+            download.cancel()
+            raise
+        
+        file_content = await download
+        
+        # Extract text, unless this exact file was extracted before
+        text_key = TextCache.key_for(file_content)
+        text = await text_cache.get(text_key)
+        if text is not None:
+            logger.info("Reusing cached text extraction")
         else:
-            raise ValueError(f"Unsupported file type: {document.file_type}")
+            text, cacheable = await _extract_text(document.file_type, file_content)
+            if cacheable:
+                await text_cache.set(text_key, text)
         
         if not text or len(text.strip()) < 100:
             raise ValueError("Extracted text is too short or empty")
@@ -105,26 +185,12 @@ async def _process_document_analysis_async(document_id: str, user_id: str, task_
         
         logger.info(f"Split into {len(chunks)} chunks")
         
-        # Analyze each chunk with AI
+        # Analyze chunks with AI, concurrently; failed chunks are skipped
         ai_engine = AIEngine()
-        chunk_analyses = []
-        total_tokens = 0
-        
-        for i, chunk in enumerate(chunks):
-            logger.info(f"Analyzing chunk {i + 1}/{len(chunks)}")
-            try:
-                result = await ai_engine.analyze_document_chunk(
-                    chunk_text=chunk["text"],
-                    document_type=document.document_type,
-                    chunk_index=i,
-                    total_chunks=len(chunks),
-                )
-                chunk_analyses.append(result)
-                total_tokens += result.get("tokens_used", 0)
-            except Exception as e:
-                logger.error(f"Error analyzing chunk {i}: {e}")
-                # Continue with other chunks
-                continue
+        results = await ai_engine.analyze_chunks(chunks, document.document_type)
+        chunk_analyses = [result for result in results if not isinstance(result, BaseException)]
+        
+        total_tokens = sum(result.get("tokens_used", 0) for result in chunk_analyses)
         
         if not chunk_analyses:
             raise ValueError("No chunks were successfully analyzed")
@@ -136,12 +202,8 @@ async def _process_document_analysis_async(document_id: str, user_id: str, task_
         # Combine analyses
         combined_data = ai_engine._combine_chunk_analyses(chunk_analyses)
         
-        # Calculate risk score
-        risk_engine = RiskEngine()
-        risks = [RiskItem(**r) for r in combined_data.get("risks", [])]
-        risk_score = risk_engine.calculate_overall_risk_score(risks)
-        
         # Identify missing clauses
+        risk_engine = RiskEngine()
         missing_clauses = risk_engine.identify_missing_clauses(
             document.document_type,
             [],  # Would need to extract clause names from analysis
@@ -166,11 +228,12 @@ async def _process_document_analysis_async(document_id: str, user_id: str, task_
                 "document_id": document_id,
                 "user_id": user_id,
                 "summary": summary,
-                "parties": [Party(**p) for p in combined_data.get("parties", [])],
-                "dates": [DateItem(**d) for d in combined_data.get("dates", [])],
-                "financial_terms": [FinancialTerm(**ft) for ft in combined_data.get("financial_terms", [])],
-                "obligations": [Obligation(**o) for o in combined_data.get("obligations", [])],
-                "risks": risks,
+                # Raw AI dicts: Analysis validates the nested items in a single pass
+                "parties": combined_data.get("parties", []),
+                "dates": combined_data.get("dates", []),
+                "financial_terms": combined_data.get("financial_terms", []),
+                "obligations": combined_data.get("obligations", []),
+                "risks": combined_data.get("risks", []),
                 "missing_clauses": missing_clauses,
                 "unusual_terms": combined_data.get("unusual_terms", []),
                 "timeline": combined_data.get("timeline", []),
@@ -181,34 +244,17 @@ async def _process_document_analysis_async(document_id: str, user_id: str, task_
             },
         )
         
+        # Calculate risk score from the validated risks
+        risk_score = risk_engine.calculate_overall_risk_score(analysis.risks)
+        
         # Update document with risk score and status
-        document.risk_score = risk_score
-        await document.update_status(db, DocumentStatus.COMPLETED)
+        await document.update_status(db, DocumentStatus.COMPLETED, risk_score=risk_score)
         
-        # Send email notification
+        # Send email notifications from their own task, off the analysis worker
         try:
-            user = await User.get_by_id(db, user_id)
-            if user and user.email:
-                email_service = EmailService()
-                await email_service.send_analysis_complete_notification(
-                    user_email=user.email,
-                    user_name=user.full_name or "User",
-                    document_name=document.name,
-                    document_id=document_id,
-                    risk_score=risk_score,
-                )
-                
-                # Send high-risk alert if applicable
-                if risk_score >= 7:
-                    await email_service.send_high_risk_alert(
-                        user_email=user.email,
-                        user_name=user.full_name or "User",
-                        document_name=document.name,
-                        document_id=document_id,
-                        risk_score=risk_score,
-                    )
+            send_analysis_emails.delay(user_id, document_id, document.name, risk_score)
         except Exception as email_error:
-            logger.warning(f"Failed to send email notification: {email_error}")
+            logger.warning(f"Failed to queue email notification: {email_error}")
         
         logger.info(f"Analysis completed for document {document_id} in {processing_time}s")
         
@@ -235,16 +281,111 @@ async def _process_document_analysis_async(document_id: str, user_id: str, task_
             raise task_instance.retry(exc=e, countdown=60 * (task_instance.request.retries + 1))
         else:
             raise
+
+
+@celery_app.task
+def send_analysis_emails(user_id: str, document_id: str, document_name: str, risk_score: int):
+    """Send analysis notification emails (sync wrapper)."""
+    return _run(_send_analysis_emails_async(user_id, document_id, document_name, risk_score))
+
+
+async def _send_analysis_emails_async(user_id: str, document_id: str, document_name: str, risk_score: int):
+    """Notify the user that analysis finished, plus a high-risk alert if applicable."""
+    db = _get_db()
+    
+    try:
+        user = await User.get_by_id(db, user_id)
+        if not user or not user.email:
+            return
+        
+        email_service = EmailService()
+        notifications = [
+            email_service.send_analysis_complete_notification(
+                user_email=user.email,
+                user_name=user.full_name or "User",
+                document_name=document_name,
+                document_id=document_id,
+                risk_score=risk_score,
+            )
+        ]
+        
+        # Send high-risk alert if applicable
+        if risk_score >= 7:
+            notifications.append(
+                email_service.send_high_risk_alert(
+                    user_email=user.email,
+                    user_name=user.full_name or "User",
+                    document_name=document_name,
+                    document_id=document_id,
+                    risk_score=risk_score,
+                )
+            )
+        
+        # Both emails go out concurrently
+        await asyncio.gather(*notifications)
+    except Exception as email_error:
+        logger.warning(f"Failed to send email notification: {email_error}")
+
+
+@celery_app.task(bind=True, max_retries=5)
+def delete_storage_file(self, file_key: str):
+    """
+    Delete a file from storage in the background.
     
-    finally:
-        client.close()
+    Deleting a missing key succeeds, so retries are safe.
+    """
+    deleted = _run(StorageService().delete_file(file_key))
+    if not deleted:
+        raise self.retry(countdown=60 * (self.request.retries + 1))
 
 
 @celery_app.task
 def handle_stripe_webhook(event_type: str, event_data: dict):
     """Handle Stripe webhook events (sync wrapper)."""
-    import asyncio
-    return asyncio.run(_handle_stripe_webhook_async(event_type, event_data))
+    return _run(_handle_stripe_webhook_async(event_type, event_data))
+
+
+async def _on_subscription_created(db: AsyncIOMotorDatabase, event_data: dict):
+    """Sync subscription status from Stripe."""
+    user_id = await Subscription.update_fields(db, event_data.get("id"), status=event_data.get("status"))
+    if user_id:
+        await cache.delete(Subscription.cache_key(user_id))
+
+
+async def _on_subscription_updated(db: AsyncIOMotorDatabase, event_data: dict):
+    """Sync subscription status and cancellation from Stripe."""
+    user_id = await Subscription.update_fields(
+        db,
+        event_data.get("id"),
+        status=event_data.get("status"),
+        cancel_at_period_end=event_data.get("cancel_at_period_end", False),
+    )
+    if user_id:
+        await cache.delete(Subscription.cache_key(user_id))
+
+
+async def _on_invoice_payment_succeeded(db: AsyncIOMotorDatabase, event_data: dict):
+    """Reset user credits on successful payment."""
+    subscription_id = event_data.get("subscription")
+    if not subscription_id:
+        return
+    
+    subscription = await Subscription.get_owner_and_plan(db, subscription_id)
+    if subscription:
+        monthly_limit = User.monthly_limit_for(subscription["plan"])
+        if monthly_limit > 0:
+            await User.set_credits(db, subscription["user_id"], monthly_limit)
+
+
+async def _ignore_event(db: AsyncIOMotorDatabase, event_data: dict):
+    """Events we don't act on."""
+
+
+_STRIPE_EVENT_HANDLERS = {
+    "customer.subscription.created": _on_subscription_created,
+    "customer.subscription.updated": _on_subscription_updated,
+    "invoice.payment_succeeded": _on_invoice_payment_succeeded,
+}
 
 
 async def _handle_stripe_webhook_async(event_type: str, event_data: dict):
@@ -258,51 +399,14 @@ async def _handle_stripe_webhook_async(event_type: str, event_data: dict):
     - invoice.payment_succeeded
     - invoice.payment_failed
     """
-    client = AsyncIOMotorClient(settings.mongodb_connection_string)
-    db = client[settings.MONGODB_DB_NAME]
+    db = _get_db()
     
     try:
-        if event_type == "customer.subscription.created":
-            subscription_id = event_data.get("id")
-            customer_id = event_data.get("customer")
-            status = event_data.get("status")
-            
-            # Find subscription by Stripe ID
-            subscription = await Subscription.get_by_stripe_subscription_id(db, subscription_id)
-            if subscription:
-                subscription.status = status
-                await subscription.save(db)
-        
-        elif event_type == "customer.subscription.updated":
-            subscription_id = event_data.get("id")
-            status = event_data.get("status")
-            cancel_at_period_end = event_data.get("cancel_at_period_end", False)
-            
-            subscription = await Subscription.get_by_stripe_subscription_id(db, subscription_id)
-            if subscription:
-                subscription.status = status
-                subscription.cancel_at_period_end = cancel_at_period_end
-                await subscription.save(db)
-        
-        elif event_type == "invoice.payment_succeeded":
-            # Reset user credits on successful payment
-            subscription_id = event_data.get("subscription")
-            if subscription_id:
-                subscription = await Subscription.get_by_stripe_subscription_id(db, subscription_id)
-                if subscription:
-                    user = await User.get_by_id(db, subscription.user_id)
-                    if user:
-                        from app.services.stripe import StripeService
-                        stripe_service = StripeService()
-                        monthly_limit = stripe_service.get_plan_limits(subscription.plan)
-                        if monthly_limit > 0:
-                            user.credits_remaining = monthly_limit
-                            await user.save(db)
+        handler = _STRIPE_EVENT_HANDLERS.get(event_type, _ignore_event)
+        await handler(db, event_data)
         
         logger.info(f"Processed Stripe webhook: {event_type}")
         
     except Exception as e:
         logger.error(f"Error handling Stripe webhook: {e}", exc_info=True)
-    finally:
-        client.close()
 
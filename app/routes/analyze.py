@@ -1,12 +1,14 @@
 """
 AI analysis endpoints.
 """
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel
 
 from app.dependencies import get_current_user_id, get_mongodb_db
-from app.models.document import Document, DocumentStatus
+from app.models.document import Document, DocumentStatus, DocumentType
 from app.models.analysis import Analysis
 from app.queues.tasks import process_document_analysis
 from app.utils.errors import NotFoundError, ValidationError
@@ -16,10 +18,33 @@ logger = setup_logger(__name__)
 
 router = APIRouter()
 
+# Analysis fields exposed by GET /{document_id}/analysis
+ANALYSIS_RESPONSE_FIELDS = {
+    "document_id",
+    "summary",
+    "parties",
+    "dates",
+    "financial_terms",
+    "obligations",
+    "risks",
+    "missing_clauses",
+    "unusual_terms",
+    "timeline",
+    "ai_model_used",
+    "tokens_used",
+    "processing_time",
+    "cost_estimate",
+    "created_at",
+}
+
+
+# Statuses that block queueing a new analysis
+IN_PROGRESS_STATUSES = [DocumentStatus.WAITING_IN_QUEUE, DocumentStatus.PROCESSING]
+
 
 class AnalyzeRequest(BaseModel):
     """Request model for analysis trigger."""
-    document_type: str = "other"
+    document_type: DocumentType = DocumentType.OTHER
     language: str = "en"
     priority: bool = False
 
@@ -37,15 +62,27 @@ async def trigger_analysis(
     Returns:
         Analysis job information
     """
-    document = await Document.get_by_id(db, document_id, user_id)
+    # Queue the document in one atomic step, so concurrent requests can't
+    # enqueue it twice; only look closer when that fails
+    document = await Document.claim_status(
+        db,
+        document_id,
+        user_id,
+        DocumentStatus.WAITING_IN_QUEUE,
+        unless_status=IN_PROGRESS_STATUSES + [DocumentStatus.UPLOADING, DocumentStatus.COMPLETED],
+    )
     if not document:
-        raise NotFoundError("Document", document_id)
-    
-    if document.status == DocumentStatus.PROCESSING:
-        raise ValidationError("Document is already being processed")
-    
-    if document.status == DocumentStatus.COMPLETED:
-        # Check if analysis already exists
+        document = await Document.get_by_id(db, document_id, user_id)
+        if not document:
+            raise NotFoundError("Document", document_id)
+        
+        if document.status == DocumentStatus.UPLOADING:
+            raise ValidationError("Document upload has not been completed")
+        
+        if document.status in IN_PROGRESS_STATUSES:
+            raise ValidationError("Document is already being processed")
+        
+        # Completed: check if analysis already exists
         existing_analysis = await Analysis.get_by_document_id(db, document_id, user_id)
         if existing_analysis:
             return {
@@ -53,9 +90,12 @@ async def trigger_analysis(
                 "status": "completed",
                 "message": "Analysis already completed",
             }
-    
-    # Update document status
-    await document.update_status(db, DocumentStatus.WAITING_IN_QUEUE)
+        
+        document = await Document.claim_status(
+            db, document_id, user_id, DocumentStatus.WAITING_IN_QUEUE, unless_status=IN_PROGRESS_STATUSES
+        )
+        if not document:
+            raise ValidationError("Document is already being processed")
     
     # Queue analysis task
     try:
@@ -86,32 +126,16 @@ async def get_analysis(
     Returns:
         Complete analysis data
     """
-    # Verify document exists and belongs to user
-    document = await Document.get_by_id(db, document_id, user_id)
+    # Verify document exists and belongs to user, fetching the analysis alongside
+    document, analysis = await asyncio.gather(
+        Document.get_by_id(db, document_id, user_id),
+        Analysis.get_by_document_id(db, document_id, user_id),
+    )
     if not document:
         raise NotFoundError("Document", document_id)
     
-    # Get analysis
-    analysis = await Analysis.get_by_document_id(db, document_id, user_id)
     if not analysis:
         raise NotFoundError("Analysis", document_id)
     
-    # Convert to response format
-    return {
-        "document_id": analysis.document_id,
-        "summary": analysis.summary,
-        "parties": [p.model_dump() for p in analysis.parties],
-        "dates": [d.model_dump() for d in analysis.dates],
-        "financial_terms": [ft.model_dump() for ft in analysis.financial_terms],
-        "obligations": [o.model_dump() for o in analysis.obligations],
-        "risks": [r.model_dump() for r in analysis.risks],
-        "missing_clauses": analysis.missing_clauses,
-        "unusual_terms": analysis.unusual_terms,
-        "timeline": analysis.timeline,
-        "ai_model_used": analysis.ai_model_used,
-        "tokens_used": analysis.tokens_used,
-        "processing_time": analysis.processing_time,
-        "cost_estimate": analysis.cost_estimate,
-        "created_at": analysis.created_at.isoformat(),
-    }
-
+    # Serialize in one pass; returning the response directly skips jsonable_encoder
+    return ORJSONResponse(content=analysis.model_dump(mode="json", include=ANALYSIS_RESPONSE_FIELDS))
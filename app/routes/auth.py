@@ -2,12 +2,13 @@
 Authentication endpoints.
 """
 from fastapi import APIRouter, Depends, Header
+from fastapi.responses import ORJSONResponse
 from typing import Optional
 
 from app.dependencies import get_current_user, get_current_user_id
 from app.models.user import User
 from app.utils.errors import AuthenticationError
-from app.utils.security import decode_jwt_token
+from app.utils.security import get_token_payload
 
 router = APIRouter()
 
@@ -39,8 +40,8 @@ async def verify_token(
     if not authorization:
         raise AuthenticationError("Missing authorization header")
     
-    # Verify token locally using JWT secret (no external API call)
-    payload = decode_jwt_token(authorization)
+    # Verify token locally using JWT secret (no external API call, cached)
+    payload = get_token_payload(authorization)
     
     # Extract user information from token payload
     user_id = payload.get("sub") or payload.get("user_id")
@@ -65,7 +66,7 @@ async def get_me(
     Returns:
         User profile data
     """
-    return {
+    return ORJSONResponse(content={
         "user_id": user.user_id,
         "email": user.email,
         "full_name": user.full_name,
@@ -74,6 +75,6 @@ async def get_me(
         "credits_remaining": user.credits_remaining,
         "company_name": user.company_name,
         "job_title": user.job_title,
-        "created_at": user.created_at.isoformat(),
-        "last_login": user.last_login.isoformat() if user.last_login else None,
-    }
+        "created_at": user.created_at,
+        "last_login": user.last_login,
+    })
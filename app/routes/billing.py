@@ -1,17 +1,21 @@
 """
 Billing and subscription endpoints.
 """
-import stripe  # type: ignore
+import asyncio
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from app.dependencies import get_current_user, get_current_user_id, get_mongodb_db
+from app.dependencies import get_current_user, get_current_user_id, get_mongodb_db, invalidate_cached_user
 from app.models.user import User
 from app.models.billing import Subscription
-from app.services.stripe import StripeService
-from app.utils.errors import BillingError, NotFoundError
+from app.queues.tasks import handle_stripe_webhook
+from app.services.cache import cache
+from app.services.stripe import StripeService, get_stripe
+from app.utils.errors import BillingError, ConflictError, NotFoundError
+from app.utils.etag import etag_response, make_etag
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -20,46 +24,73 @@ router = APIRouter()
 stripe_service = StripeService()
 
 
+# Stripe retries undelivered events for up to 3 days
+STRIPE_EVENT_DEDUPE_TTL = 3 * 24 * 3600
+
+# Subscriptions change only through /subscribe and Stripe webhooks, both of
+# which invalidate the cached copy; the TTL bounds any other drift
+SUBSCRIPTION_CACHE_TTL = 60
+
+# Upper bound on how long one /subscribe call can hold the per-user lock
+SUBSCRIPTION_LOCK_TTL = 30
+
+
+async def _get_subscription(db: AsyncIOMotorDatabase, user_id: str) -> Optional[Subscription]:
+    """Get a user's subscription through the shared cache."""
+    async def load():
+        subscription = await Subscription.get_by_user_id(db, user_id)
+        return subscription.model_dump(mode="json") if subscription else None
+    
+    data = await cache.get_or_set(Subscription.cache_key(user_id), load, ttl=SUBSCRIPTION_CACHE_TTL)
+    return Subscription.model_validate(data) if data else None
+
+
 class SubscribeRequest(BaseModel):
     """Request model for subscription."""
     plan: str  # starter, professional, enterprise
     payment_method_id: Optional[str] = None
 
 
+# Plans never change at runtime, so the response body is encoded once at import
+_PLANS_RESPONSE = {
+    "plans": [
+        {
+            "id": "starter",
+            "name": "Starter",
+            "price": 0,
+            "currency": "USD",
+            "interval": "month",
+            "document_limit": 20,
+            "features": ["Basic analysis", "PDF reports", "Email support"],
+        },
+        {
+            "id": "professional",
+            "name": "Professional",
+            "price": 29,
+            "currency": "USD",
+            "interval": "month",
+            "document_limit": 100,
+            "features": ["Advanced analysis", "Priority processing", "API access", "Email support"],
+        },
+        {
+            "id": "enterprise",
+            "name": "Enterprise",
+            "price": 149,
+            "currency": "USD",
+            "interval": "month",
+            "document_limit": -1,  # Unlimited
+            "features": ["Unlimited documents", "Dedicated support", "Custom integration", "SLA"],
+        },
+    ]
+}
+_PLANS_BYTES = orjson.dumps(_PLANS_RESPONSE)
+_PLANS_ETAG = make_etag(_PLANS_BYTES)
+
+
 @router.get("/plans")
-async def get_plans():
+async def get_plans(request: Request):
     """Get available subscription plans."""
-    return {
-        "plans": [
-            {
-                "id": "starter",
-                "name": "Starter",
-                "price": 0,
-                "currency": "USD",
-                "interval": "month",
-                "document_limit": 20,
-                "features": ["Basic analysis", "PDF reports", "Email support"],
-            },
-            {
-                "id": "professional",
-                "name": "Professional",
-                "price": 29,
-                "currency": "USD",
-                "interval": "month",
-                "document_limit": 100,
-                "features": ["Advanced analysis", "Priority processing", "API access", "Email support"],
-            },
-            {
-                "id": "enterprise",
-                "name": "Enterprise",
-                "price": 149,
-                "currency": "USD",
-                "interval": "month",
-                "document_limit": -1,  # Unlimited
-                "features": ["Unlimited documents", "Dedicated support", "Custom integration", "SLA"],
-            },
-        ]
-    }
+    return etag_response(request, _PLANS_BYTES, _PLANS_ETAG)
 
 
 @router.post("/subscribe")
@@ -69,78 +100,87 @@ async def create_subscription(
     db: AsyncIOMotorDatabase = Depends(get_mongodb_db),
 ):
     """Create or update subscription."""
-    # Check if user already has subscription
-    existing_sub = await Subscription.get_by_user_id(db, user.user_id)
-    
-    try:
-        if existing_sub and existing_sub.is_active():
-            # Update existing subscription
-            subscription = stripe.Subscription.retrieve(existing_sub.stripe_subscription_id)
-            subscription_item_id = subscription["items"]["data"][0].id
-            
-            stripe.Subscription.modify(
-                existing_sub.stripe_subscription_id,
-                items=[{
-                    "id": subscription_item_id,
-                    "price": stripe_service.PLAN_PRICE_IDS[request.plan]
-                }],
-            )
-            existing_sub.plan = request.plan
-            await existing_sub.save(db)
-            return {"message": "Subscription updated", "subscription": existing_sub.model_dump()}
-        else:
-            # Create new subscription
-            if not existing_sub or not existing_sub.stripe_customer_id:
-                # Create customer
-                customer_id = await stripe_service.create_customer(
-                    user.user_id,
-                    user.email,
-                    user.full_name,
+    async with cache.lock(f"sub:{user.user_id}", ttl=SUBSCRIPTION_LOCK_TTL) as acquired:
+        if not acquired:
+            raise ConflictError("A subscription change is already in progress")
+        
+        # Check if user already has subscription
+        existing_sub = await _get_subscription(db, user.user_id)
+        
+        try:
+            if existing_sub and existing_sub.is_active():
+                # Update existing subscription
+                # The Stripe client is blocking, so call it from worker threads
+                stripe = get_stripe()
+                subscription = await asyncio.to_thread(stripe.Subscription.retrieve, existing_sub.stripe_subscription_id)
+                subscription_item_id = subscription["items"]["data"][0].id
+                
+                await asyncio.to_thread(
+                    stripe.Subscription.modify,
+                    existing_sub.stripe_subscription_id,
+                    items=[{
+                        "id": subscription_item_id,
+                        "price": stripe_service.PLAN_PRICE_IDS[request.plan]
+                    }],
                 )
+                await existing_sub.update(db, plan=request.plan)
+                await cache.delete(Subscription.cache_key(user.user_id))
+                return {"message": "Subscription updated", "subscription": existing_sub.model_dump()}
             else:
-                customer_id = existing_sub.stripe_customer_id
-            
-            # Create subscription
-            subscription_data = await stripe_service.create_subscription(
-                customer_id,
-                request.plan,
-                request.payment_method_id,
-            )
-            
-            # Save to database
-            if existing_sub:
-                existing_sub.stripe_subscription_id = subscription_data["subscription_id"]
-                existing_sub.plan = request.plan
-                existing_sub.status = subscription_data["status"]
-                existing_sub.current_period_start = subscription_data["current_period_start"]
-                existing_sub.current_period_end = subscription_data["current_period_end"]
-                await existing_sub.save(db)
-            else:
-                subscription = await Subscription.create(
-                    db,
-                    {
-                        "user_id": user.user_id,
-                        "stripe_customer_id": customer_id,
-                        "stripe_subscription_id": subscription_data["subscription_id"],
-                        "plan": request.plan,
-                        "status": subscription_data["status"],
-                        "current_period_start": subscription_data["current_period_start"],
-                        "current_period_end": subscription_data["current_period_end"],
-                    },
+                # Create new subscription
+                if not existing_sub or not existing_sub.stripe_customer_id:
+                    # Create customer
+                    customer_id = await stripe_service.create_customer(
+                        user.user_id,
+                        user.email,
+                        user.full_name,
+                    )
+                else:
+                    customer_id = existing_sub.stripe_customer_id
+                
+                # Create subscription
+                subscription_data = await stripe_service.create_subscription(
+                    customer_id,
+                    request.plan,
+                    request.payment_method_id,
                 )
-            
-            # Update user plan and credits
-            user.plan = request.plan
-            monthly_limit = stripe_service.get_plan_limits(request.plan)
-            if monthly_limit > 0:
-                user.credits_remaining = monthly_limit
-            await user.save(db)
-            
-            return {"message": "Subscription created", "subscription": subscription_data}
-            
-    except Exception as e:
-        logger.error(f"Error creating subscription: {e}")
-        raise BillingError(f"Failed to create subscription: {str(e)}")
+                
+                # Save to database
+                if existing_sub:
+                    await existing_sub.update(
+                        db,
+                        stripe_subscription_id=subscription_data["subscription_id"],
+                        plan=request.plan,
+                        status=subscription_data["status"],
+                        current_period_start=subscription_data["current_period_start"],
+                        current_period_end=subscription_data["current_period_end"],
+                    )
+                else:
+                    subscription = await Subscription.create(
+                        db,
+                        {
+                            "user_id": user.user_id,
+                            "stripe_customer_id": customer_id,
+                            "stripe_subscription_id": subscription_data["subscription_id"],
+                            "plan": request.plan,
+                            "status": subscription_data["status"],
+                            "current_period_start": subscription_data["current_period_start"],
+                            "current_period_end": subscription_data["current_period_end"],
+                        },
+                    )
+                await cache.delete(Subscription.cache_key(user.user_id))
+                
+                # Update user plan and credits
+                monthly_limit = stripe_service.get_plan_limits(request.plan)
+                await user.update_plan(db, request.plan, credits=monthly_limit if monthly_limit > 0 else None)
+                invalidate_cached_user(user.user_id)
+                await cache.delete(User.plan_cache_key(user.user_id))
+                
+                return {"message": "Subscription created", "subscription": subscription_data}
+                
+        except Exception as e:
+            logger.error(f"Error creating subscription: {e}")
+            raise BillingError(f"Failed to create subscription: {str(e)}")
 
 
 @router.get("/portal")
@@ -149,7 +189,7 @@ async def get_customer_portal(
     db: AsyncIOMotorDatabase = Depends(get_mongodb_db),
 ):
     """Get Stripe customer portal URL."""
-    subscription = await Subscription.get_by_user_id(db, user.user_id)
+    subscription = await _get_subscription(db, user.user_id)
     if not subscription or not subscription.stripe_customer_id:
         raise NotFoundError("Subscription", user.user_id)
     
@@ -177,11 +217,18 @@ async def stripe_webhook(request: Request):
         event_type = event["type"]
         event_data = event["data"]["object"]
         
-        # Import here to avoid circular dependency
-        from app.queues.tasks import handle_stripe_webhook
+        # Stripe delivers at least once; queue each event only once
+        dedupe_key = f"stripe:evt:{event['id']}"
+        if not await cache.add(dedupe_key, ttl=STRIPE_EVENT_DEDUPE_TTL):
+            return {"status": "duplicate"}
         
         # Process webhook asynchronously
-        handle_stripe_webhook.delay(event_type, event_data)
+        try:
+            handle_stripe_webhook.delay(event_type, event_data)
+        except Exception:
+            # Let Stripe's retry through
+            await cache.delete(dedupe_key)
+            raise
         
         return {"status": "received"}
         
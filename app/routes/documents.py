@@ -2,13 +2,18 @@
 Document management endpoints.
 """
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import ORJSONResponse
 from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from app.dependencies import get_current_user_id, get_mongodb_db
-from app.models.document import Document
+from app.models.document import Document, DocumentStatus, DocumentType
 from app.utils.errors import NotFoundError, AuthorizationError
 from app.services.storage import StorageService
+from app.queues.tasks import delete_storage_file
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
 
 router = APIRouter()
 
@@ -17,8 +22,8 @@ router = APIRouter()
 async def list_documents(
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=20, ge=1, le=100),
-    document_type: Optional[str] = Query(default=None),
-    status: Optional[str] = Query(default=None),
+    document_type: Optional[DocumentType] = Query(default=None),
+    status: Optional[DocumentStatus] = Query(default=None),
     user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(get_mongodb_db),
 ):
@@ -28,7 +33,7 @@ async def list_documents(
     Returns:
         List of documents with pagination metadata
     """
-    documents = await Document.list_by_user(
+    documents, total = await Document.list_brief_and_count_by_user(
         db=db,
         user_id=user_id,
         skip=skip,
@@ -37,22 +42,15 @@ async def list_documents(
         status=status,
     )
     
-    total = await Document.count_by_user(
-        db=db,
-        user_id=user_id,
-        document_type=document_type,
-        status=status,
-    )
-    
-    return {
-        "documents": [doc.model_dump() for doc in documents],
+    return ORJSONResponse(content={
+        "documents": documents,
         "pagination": {
             "skip": skip,
             "limit": limit,
             "total": total,
             "has_more": (skip + limit) < total,
         },
-    }
+    })
 
 
 @router.get("/{document_id}")
@@ -71,7 +69,7 @@ async def get_document(
     if not document:
         raise NotFoundError("Document", document_id)
     
-    return document.model_dump()
+    return ORJSONResponse(content=document.model_dump())
 
 
 @router.delete("/{document_id}")
@@ -90,13 +88,17 @@ async def delete_document(
     if not document:
         raise NotFoundError("Document", document_id)
     
-    # Delete from storage
-    storage = StorageService()
-    file_key = storage.extract_file_key_from_url(document.file_url)
-    await storage.delete_file(file_key)
-    
     # Delete from database
     await document.delete(db)
     
+    # Storage cleanup happens in the background; the client doesn't wait on it
+    storage = StorageService()
+    file_key = storage.extract_file_key_from_url(document.file_url)
+    try:
+        delete_storage_file.delay(file_key)
+    except Exception as e:
+        logger.warning(f"Failed to queue storage cleanup, deleting inline: {e}")
+        await storage.delete_file(file_key)
+    
     return {"message": "Document deleted successfully"}
 
@@ -2,8 +2,9 @@
 Report generation endpoints.
 """
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
+import asyncio
 import json
 
 from app.dependencies import get_current_user_id, get_mongodb_db
@@ -27,22 +28,24 @@ async def download_pdf_report(
     Returns:
         PDF file
     """
-    document = await Document.get_by_id(db, document_id, user_id)
+    # Independent lookups: run both round trips at once
+    document, analysis = await asyncio.gather(
+        Document.get_by_id(db, document_id, user_id),
+        Analysis.get_by_document_id(db, document_id, user_id),
+    )
     if not document:
         raise NotFoundError("Document", document_id)
     
-    analysis = await Analysis.get_by_document_id(db, document_id, user_id)
     if not analysis:
         raise NotFoundError("Analysis", document_id)
     
-    # Generate PDF
+    # Generate PDF in memory and stream it out, with no temp file
     report_builder = ReportBuilder()
-    pdf_path = await report_builder.generate_pdf(document, analysis)
     
-    return FileResponse(
-        pdf_path,
+    return StreamingResponse(
+        report_builder.stream_pdf(document, analysis),
         media_type="application/pdf",
-        filename=f"{document.name}_report.pdf",
+        headers={"Content-Disposition": f'attachment; filename="{document.name}_report.pdf"'},
     )
 
 
@@ -58,11 +61,14 @@ async def download_json_report(
     Returns:
         JSON file
     """
-    document = await Document.get_by_id(db, document_id, user_id)
+    # Independent lookups: run both round trips at once
+    document, analysis = await asyncio.gather(
+        Document.get_by_id(db, document_id, user_id),
+        Analysis.get_by_document_id(db, document_id, user_id),
+    )
     if not document:
         raise NotFoundError("Document", document_id)
     
-    analysis = await Analysis.get_by_document_id(db, document_id, user_id)
     if not analysis:
         raise NotFoundError("Analysis", document_id)
     
@@ -72,7 +78,7 @@ async def download_json_report(
         "analysis": analysis.model_dump(),
     }
     
-    return JSONResponse(
+    return ORJSONResponse(
         content=report_data,
         headers={"Content-Disposition": f'attachment; filename="{document.name}_report.json"'},
     )
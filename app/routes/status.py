@@ -2,6 +2,7 @@
 Document processing status endpoints.
 """
 from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from app.dependencies import get_current_user_id, get_mongodb_db
@@ -10,6 +11,18 @@ from app.utils.errors import NotFoundError
 
 router = APIRouter()
 
+# Progress percentage reported for each processing status
+_STATUS_PROGRESS = {
+    "uploading": 5,
+    "uploaded": 10,
+    "parsing": 20,
+    "waiting_in_queue": 30,
+    "processing": 50,
+    "building_report": 80,
+    "completed": 100,
+    "failed": 0,
+}
+
 
 @router.get("/{document_id}/status")
 async def get_document_status(
@@ -23,29 +36,16 @@ async def get_document_status(
     Returns:
         Status information with progress
     """
-    document = await Document.get_by_id(db, document_id, user_id)
+    document = await Document.get_status_fields(db, document_id, user_id)
     if not document:
         raise NotFoundError("Document", document_id)
     
-    # Calculate progress percentage based on status
-    status_progress = {
-        "uploaded": 10,
-        "parsing": 20,
-        "waiting_in_queue": 30,
-        "processing": 50,
-        "building_report": 80,
-        "completed": 100,
-        "failed": 0,
-    }
-    
-    progress = status_progress.get(document.status, 0)
-    
-    return {
-        "document_id": document.document_id,
-        "status": document.status,
-        "progress_percent": progress,
-        "error_message": document.error_message,
-        "processing_started_at": document.processing_started_at.isoformat() if document.processing_started_at else None,
-        "processing_completed_at": document.processing_completed_at.isoformat() if document.processing_completed_at else None,
-    }
-
+    status = document.get("status")
+    return ORJSONResponse(content={
+        "document_id": document["document_id"],
+        "status": status,
+        "progress_percent": _STATUS_PROGRESS.get(status, 0),
+        "error_message": document.get("error_message"),
+        "processing_started_at": document.get("processing_started_at"),
+        "processing_completed_at": document.get("processing_completed_at"),
+    })
@@ -2,27 +2,118 @@
 Document upload endpoints.
 """
 from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi.responses import ORJSONResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import BaseModel, Field
+from typing import Optional
 
-from app.dependencies import get_current_user_id, get_mongodb_db
-from app.models.document import Document, DocumentStatus
+from app.config import Settings
+from app.dependencies import get_current_user_id, get_mongodb_db, invalidate_cached_user, settings_dep
+from app.models.document import Document, DocumentStatus, DocumentType
 from app.models.user import User
+from app.services.cache import cache
 from app.services.storage import StorageService
-from app.utils.errors import FileUploadError, ValidationError
-from app.utils.security import validate_file_type, validate_file_size
-from app.config import settings
+from app.utils.errors import FileUploadError, NotFoundError, ValidationError
+from app.utils.security import FILE_HEADER_SIZE, validate_file_signature, validate_file_type, validate_file_size
 
 router = APIRouter()
 
+# Plans change only through /billing/subscribe, which drops the cached plan
+USER_PLAN_CACHE_TTL = 300
+
+# How long a presigned direct-upload URL stays valid
+DIRECT_UPLOAD_URL_TTL = 900
+
+
+# Statuses a direct upload can't be completed from
+_NOT_UPLOADING = frozenset(status for status in DocumentStatus if status != DocumentStatus.UPLOADING)
+
+
+class UploadInitRequest(BaseModel):
+    """Request model for starting a direct upload."""
+    file_name: str
+    file_size: int = Field(..., gt=0)
+    document_type: DocumentType = DocumentType.OTHER
+    language: str = "en"
+    notes: Optional[str] = None
+
+
+class UploadCompleteRequest(BaseModel):
+    """Request model for finishing a direct upload."""
+    document_id: str
+
+
+async def _get_plan(db: AsyncIOMotorDatabase, user_id: str) -> str:
+    """Get the user's plan from the shared cache (it rarely changes)."""
+    async def load_plan():
+        return await User.get_plan(db, user_id)
+    
+    plan = await cache.get_or_set(User.plan_cache_key(user_id), load_plan, ttl=USER_PLAN_CACHE_TTL)
+    if plan is None:
+        raise ValidationError("User not found")
+    return plan
+
+
+async def _reserve_credit(db: AsyncIOMotorDatabase, user_id: str) -> bool:
+    """
+    Take one credit in a single atomic update if the user's plan is limited.
+    
+    Returns:
+        True if a credit was taken (and must be refunded if the upload fails)
+    """
+    plan = await _get_plan(db, user_id)
+    if User.monthly_limit_for(plan) <= 0:
+        return False
+    
+    if await User.try_consume_credit(db, user_id) is None:
+        raise ValidationError(
+            "Insufficient credits. Please upgrade your plan or wait for next billing cycle."
+        )
+    return True
+
+
+async def _reject_upload(
+    db: AsyncIOMotorDatabase,
+    storage: StorageService,
+    document: Document,
+    file_keys: list[str],
+    message: str,
+) -> None:
+    """Delete a bad direct upload, mark its document failed and raise."""
+    await storage.delete_files(file_keys)
+    await Document.claim_status(
+        db,
+        document.document_id,
+        document.user_id,
+        DocumentStatus.FAILED,
+        unless_status=_NOT_UPLOADING,
+        error_message=message,
+    )
+    raise FileUploadError(message)
+
+
+def _validate_upload(file_name: str, file_size: int, settings: Settings) -> None:
+    """Check file type and size limits."""
+    if not validate_file_type(file_name):
+        raise FileUploadError(
+            f"Invalid file type. Allowed: {', '.join(sorted(settings.allowed_file_extensions))}"
+        )
+    
+    if not validate_file_size(file_size):
+        raise FileUploadError(
+            f"File too large. Maximum size: {settings.MAX_FILE_SIZE_MB}MB"
+        )
+
 
 @router.post("/upload")
 async def upload_document(
     file: UploadFile = File(...),
-    document_type: str = Form(default="other"),
+    document_type: DocumentType = Form(default=DocumentType.OTHER),
     language: str = Form(default="en"),
     notes: str = Form(default=None),
     user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(get_mongodb_db),
+    settings: Settings = Depends(settings_dep),
 ):
     """
     Upload a document for analysis.
@@ -32,75 +123,209 @@ async def upload_document(
         document_type: Type of document (contract, nda, employment, etc.)
         language: Document language code
         notes: Optional user notes
-        
+    
     Returns:
         Document metadata
     """
+    # The upload is already spooled to a temporary file; size it without reading it
+    file_size = file.size
+    if file_size is None:
+        file_size = file.file.seek(0, 2)
+        file.file.seek(0)
+    
     # Validate file
-    if not validate_file_type(file.filename):
-        raise FileUploadError(
-            f"Invalid file type. Allowed: {', '.join(settings.allowed_file_extensions)}"
-        )
+    _validate_upload(file.filename, file_size, settings)
     
-    # Read file content
-    file_content = await file.read()
-    file_size = len(file_content)
+    # Check the contents before spending a credit or any storage traffic
+    header = await file.read(FILE_HEADER_SIZE)
+    await file.seek(0)
+    if not validate_file_signature(file.filename, header):
+        raise FileUploadError("File contents do not match its extension")
     
-    if not validate_file_size(file_size):
-        raise FileUploadError(
-            f"File too large. Maximum size: {settings.MAX_FILE_SIZE_MB}MB"
+    credit_reserved = await _reserve_credit(db, user_id)
+    
+    try:
+        # Upload to storage
+        storage = StorageService()
+        try:
+            file_url = await storage.upload_fileobj(
+                fileobj=file.file,
+                file_name=file.filename,
+                user_id=user_id,
+            )
+        except Exception as e:
+            raise FileUploadError(f"Failed to upload file: {str(e)}")
+        
+        # Create document record
+        file_extension = file.filename.rpartition(".")[2].lower()
+        document = await Document.create(
+            db,
+            {
+                "user_id": user_id,
+                "name": file.filename,
+                "file_url": file_url,
+                "file_type": file_extension,
+                "file_size": file_size,
+                "document_type": document_type,
+                "status": DocumentStatus.UPLOADED,
+                "language": language,
+                "notes": notes,
+            },
         )
+    except BaseException:
+        if credit_reserved:
+            await User.refund_credit(db, user_id)
+        raise
     
-    # Check user credits
-    user = await User.get_by_id(db, user_id)
-    if not user:
-        raise ValidationError("User not found")
+    if credit_reserved:
+        # The cached user still shows the old balance
+        invalidate_cached_user(user_id)
     
-    plan_limits = user.get_plan_limits()
-    if plan_limits["monthly_limit"] > 0:
-        # Check if user has credits
-        if user.credits_remaining <= 0:
-            raise ValidationError(
-                "Insufficient credits. Please upgrade your plan or wait for next billing cycle."
-            )
+    return ORJSONResponse(content={
+        "document_id": document.document_id,
+        "name": document.name,
+        "upload_url": document.file_url,
+        "status": document.status,
+        "created_at": document.created_at,
+    })
+
+
+@router.post("/upload/init")
+async def init_direct_upload(
+    request: UploadInitRequest,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_mongodb_db),
+    settings: Settings = Depends(settings_dep),
+):
+    """
+    Start a direct upload to storage.
+    
+    The client POSTs the file as a multipart form to the returned
+    upload_url, with upload_fields as the other form fields, then calls
+    /upload/complete. The file never passes through the API.
+    
+    Returns:
+        Document ID and presigned upload URL
+    """
+    _validate_upload(request.file_name, request.file_size, settings)
+    await _get_plan(db, user_id)
     
-    # Upload to storage
     storage = StorageService()
     try:
-        file_url = await storage.upload_file(
-            file_content=file_content,
-            file_name=file.filename,
-            user_id=user_id,
+        upload = storage.create_upload_url(
+            request.file_name,
+            user_id,
+            max_size=settings.max_file_size_bytes,
+            expires_in=DIRECT_UPLOAD_URL_TTL,
         )
     except Exception as e:
-        raise FileUploadError(f"Failed to upload file: {str(e)}")
+        raise FileUploadError(f"Failed to prepare upload: {str(e)}")
     
-    # Create document record
-    file_extension = file.filename.split(".")[-1].lower()
+    file_extension = request.file_name.rpartition(".")[2].lower()
     document = await Document.create(
         db,
         {
             "user_id": user_id,
-            "name": file.filename,
-            "file_url": file_url,
+            "name": request.file_name,
+            "file_url": upload["file_url"],
             "file_type": file_extension,
-            "file_size": file_size,
-            "document_type": document_type,
-            "status": DocumentStatus.UPLOADED,
-            "language": language,
-            "notes": notes,
+            "file_size": request.file_size,
+            "document_type": request.document_type,
+            "status": DocumentStatus.UPLOADING,
+            "language": request.language,
+            "notes": request.notes,
         },
     )
     
-    # Consume credit
-    if plan_limits["monthly_limit"] > 0:
-        await user.consume_credit(db)
-    
-    return {
+    return ORJSONResponse(content={
         "document_id": document.document_id,
-        "name": document.name,
-        "upload_url": document.file_url,
-        "status": document.status,
-        "created_at": document.created_at.isoformat(),
-    }
+        "upload_url": upload["upload_url"],
+        "upload_fields": upload["upload_fields"],
+        "content_type": upload["content_type"],
+        "expires_in": DIRECT_UPLOAD_URL_TTL,
+    })
+
 
+@router.post("/upload/complete")
+async def complete_direct_upload(
+    request: UploadCompleteRequest,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_mongodb_db),
+    settings: Settings = Depends(settings_dep),
+):
+    """
+    Finish a direct upload once the file is in storage.
+    
+    The upload is copied to a key the client can't write, and only that
+    copy is checked and analyzed. The credit is only taken here, so
+    abandoned uploads cost nothing.
+    
+    Returns:
+        Document metadata
+    """
+    document = await Document.get_by_id(db, request.document_id, user_id)
+    if not document:
+        raise NotFoundError("Document", request.document_id)
+    
+    if document.status != DocumentStatus.UPLOADING:
+        raise ValidationError("Upload already completed")
+    
+    # The upload URL stays valid after this call, so take a copy the
+    # client can't overwrite
+    storage = StorageService()
+    upload_key = storage.extract_file_key_from_url(document.file_url)
+    file_url = await storage.copy_file(upload_key, user_id)
+    if file_url is None:
+        raise FileUploadError("File has not been uploaded yet")
+    
+    file_key = storage.extract_file_key_from_url(file_url)
+    file_size = await storage.get_file_size(file_key)
+    if not validate_file_size(file_size):
+        await _reject_upload(
+            db, storage, document, [upload_key, file_key],
+            f"File too large. Maximum size: {settings.MAX_FILE_SIZE_MB}MB",
+        )
+    
+    # The bytes never passed through /upload/init, so check them here
+    header = await storage.download_file_header(file_key, FILE_HEADER_SIZE) if file_size else b""
+    if not validate_file_signature(document.name, header):
+        await _reject_upload(
+            db, storage, document, [upload_key, file_key],
+            "File contents do not match its extension",
+        )
+    
+    # Only one concurrent /complete call gets past this claim; the real
+    # size replaces the one declared at init
+    claimed = await Document.claim_status(
+        db,
+        document.document_id,
+        user_id,
+        DocumentStatus.UPLOADED,
+        unless_status=_NOT_UPLOADING,
+        file_url=file_url,
+        file_size=file_size,
+    )
+    if not claimed:
+        await storage.delete_file(file_key)
+        raise ValidationError("Upload already completed")
+    
+    await storage.delete_file(upload_key)
+    
+    try:
+        credit_reserved = await _reserve_credit(db, user_id)
+    except BaseException:
+        # A retry copies the file again from its new key
+        await claimed.update_status(db, DocumentStatus.UPLOADING)
+        raise
+    
+    if credit_reserved:
+        # The cached user still shows the old balance
+        invalidate_cached_user(user_id)
+    
+    return ORJSONResponse(content={
+        "document_id": claimed.document_id,
+        "name": claimed.name,
+        "upload_url": claimed.file_url,
+        "status": claimed.status,
+        "created_at": claimed.created_at,
+    })
@@ -1,12 +1,15 @@
 """
 User management endpoints.
 """
-from fastapi import APIRouter, Depends
+import orjson
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 
-from app.dependencies import get_current_user, get_mongodb_db
+from app.dependencies import get_current_user, get_mongodb_db, invalidate_cached_user
 from app.models.user import User
+from app.utils.etag import etag_response
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter()
@@ -21,10 +24,11 @@ class UpdateUserRequest(BaseModel):
 
 @router.get("/profile")
 async def get_profile(
+    request: Request,
     user: User = Depends(get_current_user),
 ):
-    """Get user profile."""
-    return user.model_dump()
+    """Get user profile (304 if unchanged since the client's copy)."""
+    return etag_response(request, orjson.dumps(user.model_dump()))
 
 
 @router.patch("/profile")
@@ -41,6 +45,10 @@ async def update_profile(
     if request.job_title is not None:
         user.job_title = request.job_title
     
-    await user.save(db)
-    return user.model_dump()
+    try:
+        await user.save(db)
+    finally:
+        # Even a failed save may have written, so reload next time
+        invalidate_cached_user(user.user_id)
+    return ORJSONResponse(content=user.model_dump())
 
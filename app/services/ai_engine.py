@@ -1,27 +1,92 @@
 """
 AI analysis engine using OpenAI and Anthropic.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
+import asyncio
+import hashlib
+import textwrap
 import time
 from openai import AsyncOpenAI
 import anthropic
+import orjson
 
 from app.config import settings
+from app.services.cache import cache
+from app.utils.circuit_breaker import CircuitBreaker
 from app.utils.logger import setup_logger
 from app.utils.errors import AIError
 
 logger = setup_logger(__name__)
 
+# Per-process provider health, shared by every AIEngine so an outage seen
+# while analyzing one document short-circuits calls for the next
+_openai_breaker = CircuitBreaker()
+_anthropic_breaker = CircuitBreaker()
+
+OPENAI_SYSTEM_PROMPT = "You are a legal document analyst. Provide structured JSON responses."
+
+_ANALYSIS_FIELDS = """{
+  "parties": [{"name": "...", "role": "...", "contact": "..."}],
+  "dates": [{"type": "...", "date": "...", "description": "..."}],
+  "financial_terms": [{"type": "...", "amount": 0.0, "currency": "USD", "frequency": "..."}],
+  "obligations": [{"party": "...", "obligation": "...", "deadline": "..."}],
+  "risks": [{"severity": "high|medium|low", "title": "...", "description": "...", "recommendation": "...", "page_reference": null}],
+  "missing_clauses": ["..."],
+  "unusual_terms": ["..."],
+  "summary": "Brief summary of this chunk"
+}"""
+
+_ANALYSIS_FOCUS = """Focus on:
+1. Identifying all parties and their roles
+2. Extracting all dates, deadlines, and important timeframes
+3. Finding financial terms (amounts, payment schedules, penalties)
+4. Listing obligations for each party
+5. Flagging potential risks (unusual clauses, missing protections, ambiguous language)
+6. Identifying missing standard clauses for this document type
+7. Noting any non-standard or unusual terms"""
+
+# Analysis instructions are identical for every chunk and come first, so
+# providers can serve them from their prompt cache; the chunk text follows
+ANALYSIS_SYSTEM_PROMPT = f"""{OPENAI_SYSTEM_PROMPT}
+
+You will be given one chunk of a legal document, with its document type.
+
+Please provide a JSON response with the following structure:
+{_ANALYSIS_FIELDS}
+
+{_ANALYSIS_FOCUS}
+
+Be thorough and accurate. If information is not present in this chunk, use empty arrays.
+"""
+
+BATCH_ANALYSIS_SYSTEM_PROMPT = f"""{OPENAI_SYSTEM_PROMPT}
+
+You will be given several consecutive chunks of a legal document, with its document type.
+
+Please provide a JSON response with one entry per chunk, in the same order as the chunks:
+{{
+  "chunks": [
+{textwrap.indent(_ANALYSIS_FIELDS, "    ")}
+  ]
+}}
+
+{_ANALYSIS_FOCUS}
+
+Be thorough and accurate. If information is not present in a chunk, use empty arrays for that chunk.
+"""
+
 
 class AIEngine:
     """Service for AI-powered document analysis."""
     
     def __init__(self):
         self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.anthropic_client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY) if settings.ANTHROPIC_API_KEY else None
+        self.anthropic_client = anthropic.AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY) if settings.ANTHROPIC_API_KEY else None
         self.default_model = settings.DEFAULT_AI_MODEL
         self.fallback_model = settings.AI_FALLBACK_MODEL
         self.temperature = settings.AI_TEMPERATURE
+        self.openai_breaker = _openai_breaker
+        self.anthropic_breaker = _anthropic_breaker
     
     async def analyze_document_chunk(
         self,
@@ -40,111 +105,358 @@ class AIEngine:
             chunk_index: Current chunk index
             total_chunks: Total number of chunks
             model: AI model to use (optional)
-            
+        
         Returns:
             Analysis result dictionary
         """
+        prompt = self._build_analysis_prompt(chunk_text, document_type, chunk_index, total_chunks)
+        return await self._call_model(ANALYSIS_SYSTEM_PROMPT, prompt, model or self.default_model, f"chunk {chunk_index}")
+    
+    async def analyze_chunks(
+        self,
+        chunks: List[Dict[str, Any]],
+        document_type: str,
+        model: Optional[str] = None,
+    ) -> List[Union[Dict[str, Any], BaseException]]:
+        """
+        Analyze all chunks of a document concurrently.
+        
+        Chunks are sent in batches of AI_CHUNKS_PER_BATCH, with at most
+        AI_MAX_CONCURRENT_CHUNKS requests in flight to respect provider
+        rate limits.
+        
+        Args:
+            chunks: Chunks from DocumentChunker, in order
+            document_type: Type of document (contract, nda, etc.)
+            model: AI model to use (optional)
+        
+        Returns:
+            One analysis result dictionary per chunk, in order, or the
+            exception that failed the chunk (or its whole batch)
+        """
+        semaphore = asyncio.Semaphore(settings.AI_MAX_CONCURRENT_CHUNKS)
+        batch_size = max(1, settings.AI_CHUNKS_PER_BATCH)
+        
+        async def analyze_batch(start: int):
+            batch = chunks[start:start + batch_size]
+            async with semaphore:
+                logger.info(f"Analyzing chunks {start + 1}-{start + len(batch)}/{len(chunks)}")
+                return await self.analyze_chunks_batched(
+                    chunk_texts=[chunk["text"] for chunk in batch],
+                    document_type=document_type,
+                    start_index=start,
+                    total_chunks=len(chunks),
+                    model=model,
+                )
+        
+        batch_starts = range(0, len(chunks), batch_size)
+        batch_results = await asyncio.gather(
+            *(analyze_batch(start) for start in batch_starts),
+            return_exceptions=True,
+        )
+        
+        results = []
+        for start, batch_result in zip(batch_starts, batch_results):
+            if isinstance(batch_result, BaseException):
+                logger.error(f"Error analyzing chunks starting at {start}: {batch_result}")
+                results.extend([batch_result] * len(chunks[start:start + batch_size]))
+            else:
+                results.extend(batch_result)
+        return results
+    
+    async def analyze_chunks_batched(
+        self,
+        chunk_texts: List[str],
+        document_type: str,
+        start_index: int,
+        total_chunks: int,
+        model: Optional[str] = None,
+    ) -> List[Union[Dict[str, Any], BaseException]]:
+        """
+        Analyze several consecutive chunks in a single AI request.
+        
+        The instructions are sent once for the whole batch, and the model
+        answers with one analysis per chunk. If the response doesn't line up
+        with the chunks, each chunk is analyzed on its own instead, and a
+        chunk that fails then doesn't fail the others.
+        
+        Args:
+            chunk_texts: Text content of consecutive chunks
+            document_type: Type of document (contract, nda, etc.)
+            start_index: Index of the first chunk in the batch
+            total_chunks: Total number of chunks
+            model: AI model to use (optional)
+        
+        Returns:
+            One analysis result dictionary per chunk, in order, or the
+            exception that failed the chunk when analyzed on its own
+        """
         model = model or self.default_model
         
-        prompt = self._build_analysis_prompt(chunk_text, document_type, chunk_index, total_chunks)
+        if len(chunk_texts) == 1:
+            return [await self.analyze_document_chunk(chunk_texts[0], document_type, start_index, total_chunks, model)]
+        
+        prompt = self._build_batch_analysis_prompt(chunk_texts, document_type, start_index, total_chunks)
+        end_index = start_index + len(chunk_texts) - 1
+        response = await self._call_model(BATCH_ANALYSIS_SYSTEM_PROMPT, prompt, model, f"chunks {start_index}-{end_index}")
+        
+        result = response["result"]
+        analyses = result.get("chunks") if isinstance(result, dict) else None
+        if not isinstance(analyses, list) or len(analyses) != len(chunk_texts):
+            logger.warning(f"Batched analysis of chunks {start_index}-{end_index} was malformed, analyzing individually")
+            results = await asyncio.gather(
+                *(
+                    self.analyze_document_chunk(text, document_type, start_index + offset, total_chunks, model)
+                    for offset, text in enumerate(chunk_texts)
+                ),
+                return_exceptions=True,
+            )
+            for offset, chunk_result in enumerate(results):
+                if isinstance(chunk_result, BaseException):
+                    logger.error(f"Error analyzing chunk {start_index + offset}: {chunk_result}")
+            return results
+        
+        # Attribute the request's token usage to the first chunk so totals stay correct
+        return [
+            {
+                "result": analysis if isinstance(analysis, dict) else {},
+                "tokens_used": response["tokens_used"] if offset == 0 else 0,
+                "model": response["model"],
+            }
+            for offset, analysis in enumerate(analyses)
+        ]
+    
+    async def _call_model(self, system_prompt: str, prompt: str, model: str, label: str) -> Dict[str, Any]:
+        """Send prompt to the model's provider, falling back to Anthropic on failure."""
+        can_fall_back = model != self.fallback_model and self.anthropic_client
+        if can_fall_back and settings.AI_HEDGE_DELAY_MS > 0:
+            return await self._call_model_hedged(system_prompt, prompt, model, label)
         
         try:
-            if model.startswith("gpt-") or model.startswith("o1-"):
-                result = await self._call_openai(prompt, model)
-            elif model.startswith("claude-"):
-                result = await self._call_anthropic(prompt, model)
-            else:
-                # Default to OpenAI
-                result = await self._call_openai(prompt, self.default_model)
-            
-            return result
-            
+            return await self._call_provider(system_prompt, prompt, model)
+        
         except Exception as e:
-            logger.error(f"AI analysis failed for chunk {chunk_index}: {e}")
+            logger.error(f"AI analysis failed for {label}: {e}")
             # Try fallback if available
-            if model != self.fallback_model and self.anthropic_client:
+            if can_fall_back:
                 logger.info(f"Trying fallback model: {self.fallback_model}")
                 try:
-                    return await self._call_anthropic(prompt, self.fallback_model)
+                    return await self._call_anthropic(prompt, self.fallback_model, system_prompt)
                 except Exception as fallback_error:
                     logger.error(f"Fallback also failed: {fallback_error}")
                     raise AIError(f"AI analysis failed: {str(e)}")
             raise AIError(f"AI analysis failed: {str(e)}")
     
-    async def _call_openai(self, prompt: str, model: str) -> Dict[str, Any]:
-        """Call OpenAI API."""
+    async def _call_model_hedged(self, system_prompt: str, prompt: str, model: str, label: str) -> Dict[str, Any]:
+        """
+        Send prompt to the model's provider, and also to the fallback model if
+        no answer arrives within AI_HEDGE_DELAY_MS (or as soon as the primary
+        fails). The first successful response wins; the other call is cancelled.
+        """
+        primary_failed = asyncio.Event()
+        
+        async def call_fallback():
+            try:
+                await asyncio.wait_for(primary_failed.wait(), timeout=settings.AI_HEDGE_DELAY_MS / 1000)
+                logger.info(f"Trying fallback model: {self.fallback_model}")
+            except asyncio.TimeoutError:
+                logger.info(f"AI analysis slow for {label}, hedging with fallback model: {self.fallback_model}")
+            return await self._call_anthropic(prompt, self.fallback_model, system_prompt)
+        
+        primary = asyncio.create_task(self._call_provider(system_prompt, prompt, model))
+        fallback = asyncio.create_task(call_fallback())
+        pending = {primary, fallback}
+        error = None
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    
+                    if task is primary:
+                        logger.error(f"AI analysis failed for {label}: {task.exception()}")
+                        error = task.exception()
+                        primary_failed.set()
+                    else:
+                        logger.error(f"Fallback failed for {label}: {task.exception()}")
+                        error = error or task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        raise AIError(f"AI analysis failed: {str(error)}")
+    
+    async def _call_provider(self, system_prompt: str, prompt: str, model: str) -> Dict[str, Any]:
+        """Send prompt to the provider serving model."""
+        if model.startswith("gpt-") or model.startswith("o1-"):
+            return await self._call_openai(prompt, model, system_prompt)
+        elif model.startswith("claude-"):
+            return await self._call_anthropic(prompt, model, system_prompt)
+        else:
+            # Default to OpenAI
+            return await self._call_openai(prompt, self.default_model, system_prompt)
+    
+    def _response_cache_key(self, model: str, system_prompt: str, prompt: str) -> str:
+        """Cache key identifying an AI request by everything that shapes its answer."""
+        request = "\0".join([model, system_prompt, prompt, str(self.temperature)])
+        return "llm:" + hashlib.sha256(request.encode()).hexdigest()
+    
+    async def _get_cached_response(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached AI response; it cost no tokens this time."""
+        if settings.AI_RESPONSE_CACHE_TTL <= 0:
+            return None
+        
+        cached = await cache.get(key)
+        if cached is not None:
+            cached["tokens_used"] = 0
+        return cached
+    
+    async def _cache_response(self, key: str, response: Dict[str, Any]) -> None:
+        """Cache a successfully parsed AI response."""
+        result = response["result"]
+        if settings.AI_RESPONSE_CACHE_TTL > 0 and isinstance(result, dict) and not result.get("raw"):
+            await cache.set(key, response, ttl=settings.AI_RESPONSE_CACHE_TTL)
+    
+    async def _call_openai(self, prompt: str, model: str, system_prompt: str = OPENAI_SYSTEM_PROMPT) -> Dict[str, Any]:
+        """Call OpenAI API (it caches long repeated prompt prefixes automatically)."""
+        cache_key = self._response_cache_key(model, system_prompt, prompt)
+        cached = await self._get_cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Fail fast (straight to the fallback) while OpenAI keeps failing
+        if not self.openai_breaker.allow_request():
+            raise AIError("OpenAI circuit open after repeated failures")
+        
         try:
-            response = await self.openai_client.chat.completions.create(
+            # Stream the completion, so the reply is read while it's generated
+            stream = await self.openai_client.chat.completions.create(
                 model=model,
                 messages=[
-                    {"role": "system", "content": "You are a legal document analyst. Provide structured JSON responses."},
+                    {"role": "system", "content": system_prompt},
                     {"role": "user", "content": prompt},
                 ],
                 temperature=self.temperature,
                 response_format={"type": "json_object"} if "gpt-4" in model or "gpt-5" in model else None,
+                stream=True,
+                # Ask for a final chunk carrying token usage
+                extra_body={"stream_options": {"include_usage": True}},
             )
             
-            content = response.choices[0].message.content
-            tokens_used = response.usage.total_tokens
-            
-            # Parse JSON response
-            import json
-            try:
-                result = json.loads(content)
-            except json.JSONDecodeError:
-                # If not JSON, wrap in structure
-                result = {"analysis": content, "raw": True}
-            
-            return {
-                "result": result,
-                "tokens_used": tokens_used,
-                "model": model,
-            }
-            
+            # Collect deltas in a list and join once, not by repeated concatenation
+            parts: List[str] = []
+            result = None
+            tokens_used = 0
+            async for chunk in stream:
+                if result is None and chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    result = self._maybe_parse_accumulated(parts)
+                # The stream is still drained for the trailing usage chunk
+                usage = getattr(chunk, "usage", None)
+                if usage:
+                    tokens_used = usage["total_tokens"] if isinstance(usage, dict) else usage.total_tokens
+        except asyncio.CancelledError:
+            # Cancelled (e.g. lost a hedge), which says nothing about OpenAI's health
+            self.openai_breaker.release()
+            raise
         except Exception as e:
             logger.error(f"OpenAI API error: {e}")
+            self.openai_breaker.record(False)
             raise
+        
+        self.openai_breaker.record(True)
+        if result is None:
+            # If not JSON, wrap in structure
+            result = {"analysis": "".join(parts), "raw": True}
+        
+        analysis = {
+            "result": result,
+            "tokens_used": tokens_used,
+            "model": model,
+        }
+        await self._cache_response(cache_key, analysis)
+        return analysis
     
-    async def _call_anthropic(self, prompt: str, model: str) -> Dict[str, Any]:
-        """Call Anthropic API."""
+    @staticmethod
+    def _maybe_parse_accumulated(parts: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Parse streamed JSON once it may be complete.
+        
+        Parsing is only attempted when the newest text ends with a closing
+        brace or bracket, so a long reply isn't re-parsed on every delta.
+        
+        Returns:
+            Parsed value, or None if it isn't complete JSON yet
+        """
+        last = next((part for part in reversed(parts) if part.strip()), "")
+        if not last.rstrip().endswith(("}", "]")):
+            return None
+        try:
+            return orjson.loads("".join(parts))
+        except orjson.JSONDecodeError:
+            return None
+    
+    async def _call_anthropic(self, prompt: str, model: str, system_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """Call Anthropic API (the system prompt is marked for prompt caching)."""
         if not self.anthropic_client:
             raise AIError("Anthropic API key not configured")
         
+        cache_key = self._response_cache_key(model, system_prompt or "", prompt)
+        system = (
+            [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+            if system_prompt
+            else anthropic.NOT_GIVEN
+        )
+        cached = await self._get_cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
+        if not self.anthropic_breaker.allow_request():
+            raise AIError("Anthropic circuit open after repeated failures")
+        
         try:
-            # Anthropic uses sync API, so we need to run in executor
-            import asyncio
-            
-            def _call():
-                return self.anthropic_client.messages.create(
-                    model=model,
-                    max_tokens=4096,
-                    temperature=self.temperature,
-                    messages=[
-                        {"role": "user", "content": prompt},
-                    ],
-                )
-            
-            response = await asyncio.to_thread(_call)
-            
-            content = response.content[0].text
-            tokens_used = response.usage.input_tokens + response.usage.output_tokens
-            
-            # Parse JSON response
-            import json
-            try:
-                result = json.loads(content)
-            except json.JSONDecodeError:
-                result = {"analysis": content, "raw": True}
-            
-            return {
-                "result": result,
-                "tokens_used": tokens_used,
-                "model": model,
-            }
-            
+            # Stream the reply, collecting text deltas in a list; cancelling
+            # this call (e.g. it lost a hedge) closes the stream, so the
+            # reply stops generating
+            async with self.anthropic_client.messages.stream(
+                model=model,
+                max_tokens=4096,
+                temperature=self.temperature,
+                system=system,
+                messages=[
+                    {"role": "user", "content": prompt},
+                ],
+            ) as stream:
+                parts = [text async for text in stream.text_stream]
+                usage = (await stream.get_final_message()).usage
+            content = "".join(parts)
+        except asyncio.CancelledError:
+            # Cancelled (e.g. lost a hedge), which says nothing about Anthropic's health
+            self.anthropic_breaker.release()
+            raise
         except Exception as e:
             logger.error(f"Anthropic API error: {e}")
+            self.anthropic_breaker.record(False)
             raise
+        
+        self.anthropic_breaker.record(True)
+        tokens_used = usage.input_tokens + usage.output_tokens
+        
+        # Parse JSON response
+        try:
+            result = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            result = {"analysis": content, "raw": True}
+        
+        analysis = {
+            "result": result,
+            "tokens_used": tokens_used,
+            "model": model,
+        }
+        await self._cache_response(cache_key, analysis)
+        return analysis
     
     def _build_analysis_prompt(
         self,
@@ -153,36 +465,30 @@ class AIEngine:
         chunk_index: int,
         total_chunks: int,
     ) -> str:
-        """Build analysis prompt for AI."""
-        return f"""Analyze this legal document chunk ({chunk_index + 1} of {total_chunks}).
+        """Build the per-chunk part of the analysis prompt (instructions are in ANALYSIS_SYSTEM_PROMPT)."""
+        return f"""Document Type: {document_type}
 
-Document Type: {document_type}
-
-Document Text:
+Chunk {chunk_index + 1} of {total_chunks}:
 {chunk_text}
+"""
 
-Please provide a JSON response with the following structure:
-{{
-  "parties": [{{"name": "...", "role": "...", "contact": "..."}}],
-  "dates": [{{"type": "...", "date": "...", "description": "..."}}],
-  "financial_terms": [{{"type": "...", "amount": 0.0, "currency": "USD", "frequency": "..."}}],
-  "obligations": [{{"party": "...", "obligation": "...", "deadline": "..."}}],
-  "risks": [{{"severity": "high|medium|low", "title": "...", "description": "...", "recommendation": "...", "page_reference": null}}],
-  "missing_clauses": ["..."],
-  "unusual_terms": ["..."],
-  "summary": "Brief summary of this chunk"
-}}
+    def _build_batch_analysis_prompt(
+        self,
+        chunk_texts: List[str],
+        document_type: str,
+        start_index: int,
+        total_chunks: int,
+    ) -> str:
+        """Build the per-batch part of the analysis prompt (instructions are in BATCH_ANALYSIS_SYSTEM_PROMPT)."""
+        sections = "\n\n".join(
+            f"--- Chunk {start_index + offset + 1} of {total_chunks} ---\n{text}"
+            for offset, text in enumerate(chunk_texts)
+        )
+        return f"""Document Type: {document_type}
 
-Focus on:
-1. Identifying all parties and their roles
-2. Extracting all dates, deadlines, and important timeframes
-3. Finding financial terms (amounts, payment schedules, penalties)
-4. Listing obligations for each party
-5. Flagging potential risks (unusual clauses, missing protections, ambiguous language)
-6. Identifying missing standard clauses for this document type
-7. Noting any non-standard or unusual terms
+Analyze each of these {len(chunk_texts)} chunks separately.
 
-Be thorough and accurate. If information is not present in this chunk, use empty arrays.
+{sections}
 """
 
     async def generate_summary(
@@ -196,7 +502,7 @@ Be thorough and accurate. If information is not present in this chunk, use empty
         Args:
             all_chunk_analyses: List of analysis results from all chunks
             document_type: Type of document
-            
+        
         Returns:
             Executive summary text (2-3 paragraphs)
         """
@@ -220,7 +526,7 @@ Provide a clear, professional summary that:
 
 Write in clear, professional language suitable for legal professionals.
 """
-        
+
         try:
             if self.default_model.startswith("gpt-"):
                 response = await self.openai_client.chat.completions.create(
@@ -234,13 +540,10 @@ Write in clear, professional language suitable for legal professionals.
                 return response.choices[0].message.content
             else:
                 # Use Anthropic
-                import asyncio
-                response = await asyncio.to_thread(
-                    lambda: self.anthropic_client.messages.create(
-                        model=self.fallback_model,
-                        max_tokens=1000,
-                        messages=[{"role": "user", "content": summary_prompt}],
-                    )
+                response = await self.anthropic_client.messages.create(
+                    model=self.fallback_model,
+                    max_tokens=1000,
+                    messages=[{"role": "user", "content": summary_prompt}],
                 )
                 return response.content[0].text
         except Exception as e:
@@ -250,65 +553,42 @@ Write in clear, professional language suitable for legal professionals.
     
     def _combine_chunk_analyses(self, chunk_analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Combine analyses from all chunks, deduplicating."""
-        combined = {
-            "parties": [],
-            "dates": [],
-            "financial_terms": [],
-            "obligations": [],
-            "risks": [],
-            "missing_clauses": [],
-            "unusual_terms": [],
-        }
-        
-        seen_parties = set()
-        seen_dates = set()
-        seen_risks = set()
-        seen_clauses = set()
-        seen_terms = set()
+        # Deduplicated items keyed by their identity; dicts keep first-seen order
+        parties = {}
+        dates = {}
+        risks = {}
+        missing_clauses = {}
+        unusual_terms = {}
+        financial_terms = []
+        obligations = []
         
         for chunk_result in chunk_analyses:
             analysis = chunk_result.get("result", {})
             
-            # Combine parties (deduplicate by name+role)
+            # Parties deduplicate by name+role, dates by type+date, risks by title
             for party in analysis.get("parties", []):
-                key = (party.get("name", ""), party.get("role", ""))
-                if key not in seen_parties:
-                    combined["parties"].append(party)
-                    seen_parties.add(key)
-            
-            # Combine dates (deduplicate by type+date)
+                parties.setdefault((party.get("name", ""), party.get("role", "")), party)
             for date_item in analysis.get("dates", []):
-                key = (date_item.get("type", ""), date_item.get("date", ""))
-                if key not in seen_dates:
-                    combined["dates"].append(date_item)
-                    seen_dates.add(key)
-            
-            # Combine financial terms
-            combined["financial_terms"].extend(analysis.get("financial_terms", []))
-            
-            # Combine obligations
-            combined["obligations"].extend(analysis.get("obligations", []))
-            
-            # Combine risks (deduplicate by title)
+                dates.setdefault((date_item.get("type", ""), date_item.get("date", "")), date_item)
             for risk in analysis.get("risks", []):
-                title = risk.get("title", "")
-                if title not in seen_risks:
-                    combined["risks"].append(risk)
-                    seen_risks.add(title)
+                risks.setdefault(risk.get("title", ""), risk)
             
-            # Combine missing clauses (deduplicate)
-            for clause in analysis.get("missing_clauses", []):
-                if clause not in seen_clauses:
-                    combined["missing_clauses"].append(clause)
-                    seen_clauses.add(clause)
+            missing_clauses.update(dict.fromkeys(analysis.get("missing_clauses", [])))
+            unusual_terms.update(dict.fromkeys(analysis.get("unusual_terms", [])))
             
-            # Combine unusual terms (deduplicate)
-            for term in analysis.get("unusual_terms", []):
-                if term not in seen_terms:
-                    combined["unusual_terms"].append(term)
-                    seen_terms.add(term)
+            # Financial terms and obligations are kept as-is
+            financial_terms.extend(analysis.get("financial_terms", []))
+            obligations.extend(analysis.get("obligations", []))
         
-        return combined
+        return {
+            "parties": list(parties.values()),
+            "dates": list(dates.values()),
+            "financial_terms": financial_terms,
+            "obligations": obligations,
+            "risks": list(risks.values()),
+            "missing_clauses": list(missing_clauses),
+            "unusual_terms": list(unusual_terms),
+        }
     
     def _generate_fallback_summary(self, combined_data: Dict[str, Any], document_type: str) -> str:
         """Generate a simple fallback summary if AI fails."""
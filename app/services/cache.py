@@ -0,0 +1,135 @@
+"""
+Shared Redis cache, visible to API and worker processes alike.
+"""
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+import orjson
+from redis import asyncio as aioredis
+
+from app.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class RedisCache:
+    """
+    JSON value cache in Redis.
+    
+    Redis errors never fail a request: reads fall through to the loader
+    and writes are skipped.
+    """
+    
+    KEY_PREFIX = "cache:"
+    LOCK_PREFIX = "lock:"
+    
+    # Delete the lock only if it still holds our token, so an expired lock
+    # re-taken by someone else is never released by us
+    _RELEASE_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+    
+    def __init__(self, url: Optional[str] = None):
+        self.redis = aioredis.Redis.from_url(url or settings.REDIS_URL, decode_responses=False)
+    
+    async def get(self, key: str) -> Any:
+        """Get cached value, or None if missing (or Redis is unavailable)."""
+        try:
+            cached = await self.redis.get(self.KEY_PREFIX + key)
+            if cached is not None:
+                return orjson.loads(cached)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+        return None
+    
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Cache a JSON-serializable value."""
+        try:
+            await self.redis.set(self.KEY_PREFIX + key, orjson.dumps(value), ex=ttl)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+    
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """
+        Get cached value, or load and cache it.
+        
+        Args:
+            key: Cache key
+            loader: Coroutine function producing a JSON-serializable value
+            ttl: Lifetime in seconds (None keeps the value until deleted)
+        
+        Returns:
+            Cached or freshly loaded value (None results are not cached)
+        """
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+        
+        value = await loader()
+        if value is not None:
+            await self.set(key, value, ttl=ttl)
+        return value
+    
+    async def add(self, key: str, ttl: int) -> bool:
+        """
+        Mark key as seen, unless it already is.
+        
+        Returns:
+            True if the key was newly added (or Redis is unavailable),
+            False if it already existed
+        """
+        try:
+            return bool(await self.redis.set(self.KEY_PREFIX + key, b"1", ex=ttl, nx=True))
+        except Exception as e:
+            logger.warning(f"Cache add failed for {key}: {e}")
+            return True
+    
+    @asynccontextmanager
+    async def lock(self, key: str, ttl: int) -> AsyncIterator[bool]:
+        """
+        Hold a mutex shared by all processes for the duration of the block.
+        
+        Args:
+            key: Lock name
+            ttl: Seconds after which the lock frees itself if never released
+        
+        Yields:
+            True if the lock was acquired (or Redis is unavailable),
+            False if someone else holds it
+        """
+        lock_key = self.LOCK_PREFIX + key
+        token = uuid.uuid4().hex.encode()
+        try:
+            acquired = bool(await self.redis.set(lock_key, token, ex=ttl, nx=True))
+        except Exception as e:
+            logger.warning(f"Lock acquire failed for {key}: {e}")
+            yield True
+            return
+        
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    await self.redis.eval(self._RELEASE_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.warning(f"Lock release failed for {key}: {e}")
+    
+    async def delete(self, key: str) -> None:
+        """Drop a cached value."""
+        try:
+            await self.redis.delete(self.KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"Cache delete failed for {key}: {e}")
+
+
+cache = RedisCache()
@@ -1,7 +1,10 @@
 """
 Document chunking service for LLM processing.
 """
-from typing import List
+import functools
+import os
+import re
+from typing import List, Optional, Pattern, Tuple, Union
 import tiktoken
 
 from app.config import settings
@@ -9,6 +12,32 @@ from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Threads tiktoken may use to encode a batch of pieces
+ENCODE_THREADS = os.cpu_count() or 1
+
+# Sentence end: terminal punctuation plus the whitespace after it, but not
+# the dot of a single-letter initial ("U.S.", "J. Smith")
+_SENTENCE_END = re.compile(r"(?<!\b[A-Z])[.!?]+(?:\s+|$)")
+
+
+@functools.lru_cache(maxsize=8)
+def _get_encoding(model: str) -> tiktoken.Encoding:
+    """
+    Get the tiktoken encoding for a model, loaded once per process.
+    
+    Encodings are thread-safe, so every chunker shares the same one.
+    """
+    # Try the model first (if available), fallback to GPT-4, then to base encoding
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        try:
+            # Fallback to GPT-4 encoding (compatible with GPT-5)
+            return tiktoken.encoding_for_model("gpt-4")
+        except Exception:
+            # Final fallback to base encoding
+            return tiktoken.get_encoding("cl100k_base")
+
 
 class DocumentChunker:
     """Service for splitting documents into LLM-friendly chunks."""
@@ -16,21 +45,25 @@ class DocumentChunker:
     def __init__(self, max_tokens: int = None):
         self.max_tokens = max_tokens or settings.MAX_TOKENS_PER_CHUNK
         # Use tiktoken for accurate token counting
-        # Try GPT-5 first (if available), fallback to GPT-4, then to base encoding
-        try:
-            self.encoding = tiktoken.encoding_for_model(settings.DEFAULT_AI_MODEL)
-        except:
-            try:
-                # Fallback to GPT-4 encoding (compatible with GPT-5)
-                self.encoding = tiktoken.encoding_for_model("gpt-4")
-            except:
-                # Final fallback to base encoding
-                self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.encoding = _get_encoding(settings.DEFAULT_AI_MODEL)
+    
+    # Separators tried in order when a piece of text is too large
+    SEPARATORS: Tuple[Union[str, Pattern[str]], ...] = ("\n\n", "\n", _SENTENCE_END, " ")
+    
+    # Chunks smaller than this are merged into a neighbor
+    MIN_CHUNK_TOKENS = 100
+    
+    # How far a tiny-chunk merge may exceed the token budget
+    MERGE_SLACK = 1.05
     
     def chunk_text(self, text: str, overlap: int = 200) -> List[dict]:
         """
         Split text into chunks with token limits.
         
+        Text is first split recursively (paragraphs, lines, sentences,
+        words) until every piece fits, then adjacent pieces are merged
+        greedily up to the limit, so chunks come out as full as possible.
+        
         Args:
             text: Full document text
             overlap: Number of tokens to overlap between chunks
@@ -41,88 +74,124 @@ class DocumentChunker:
         if not text or not text.strip():
             return []
         
-        # Split by paragraphs first (preserve structure)
-        paragraphs = text.split("\n\n")
-        
-        chunks = []
-        current_chunk = []
-        current_tokens = 0
+        # Leave room for the overlap carried over from the previous chunk
+        budget = max(self.max_tokens - overlap, self.max_tokens // 2)
         
-        for para in paragraphs:
-            para_tokens = len(self.encoding.encode(para))
-            
-            # If paragraph alone exceeds limit, split it further
-            if para_tokens > self.max_tokens:
-                # Save current chunk if exists
-                if current_chunk:
-                    chunks.append(self._create_chunk(current_chunk, len(chunks)))
-                    current_chunk = []
-                    current_tokens = 0
-                
-                # Split large paragraph by sentences
-                sentences = para.split(". ")
-                for sentence in sentences:
-                    sent_tokens = len(self.encoding.encode(sentence))
-                    if current_tokens + sent_tokens > self.max_tokens:
-                        if current_chunk:
-                            chunks.append(self._create_chunk(current_chunk, len(chunks)))
-                            # Add overlap from previous chunk
-                            overlap_text = self._get_overlap_text(current_chunk, overlap)
-                            current_chunk = [overlap_text, sentence] if overlap_text else [sentence]
-                            current_tokens = len(self.encoding.encode(" ".join(current_chunk)))
-                        else:
-                            current_chunk = [sentence]
-                            current_tokens = sent_tokens
-                    else:
-                        current_chunk.append(sentence)
-                        current_tokens += sent_tokens
-            else:
-                # Check if adding paragraph exceeds limit
-                if current_tokens + para_tokens > self.max_tokens:
-                    if current_chunk:
-                        chunks.append(self._create_chunk(current_chunk, len(chunks)))
-                        # Add overlap
-                        overlap_text = self._get_overlap_text(current_chunk, overlap)
-                        current_chunk = [overlap_text, para] if overlap_text else [para]
-                        current_tokens = len(self.encoding.encode(" ".join(current_chunk)))
-                    else:
-                        current_chunk = [para]
-                        current_tokens = para_tokens
-                else:
-                    current_chunk.append(para)
-                    current_tokens += para_tokens
+        # Pieces carry their token IDs, so nothing is encoded twice
+        pieces = self._split(text, self.SEPARATORS, budget)
+        merged = self._merge(pieces, budget)
+        merged = self._merge_tiny(merged, int(budget * self.MERGE_SLACK))
         
-        # Add final chunk
-        if current_chunk:
-            chunks.append(self._create_chunk(current_chunk, len(chunks)))
+        chunks = []
+        previous_tokens: List[int] = []
+        for piece_text, piece_tokens in merged:
+            if not piece_text.strip():
+                continue
+            overlap_text, overlap_count = self._get_overlap_text(previous_tokens, overlap)
+            chunk_text = f"{overlap_text}\n\n{piece_text}" if overlap_text else piece_text
+            chunks.append(self._create_chunk(chunk_text.strip(), len(chunks), overlap_count + len(piece_tokens)))
+            previous_tokens = piece_tokens
         
         logger.info(f"Split document into {len(chunks)} chunks")
         return chunks
     
-    def _create_chunk(self, text_parts: List[str], chunk_index: int) -> dict:
-        """Create chunk dictionary."""
-        text = "\n\n".join(text_parts)
-        tokens = len(self.encoding.encode(text))
+    def _split(
+        self,
+        text: str,
+        separators: Tuple[Union[str, Pattern[str]], ...],
+        budget: int,
+        tokens: Optional[List[int]] = None,
+    ) -> List[Tuple[str, List[int]]]:
+        """
+        Recursively split text until every piece fits in budget, keeping separators.
+        
+        tokens are text's token IDs when the caller already has them; the
+        whole document is never encoded, only its parts.
+        """
+        if tokens is not None and len(tokens) <= budget:
+            return [(text, tokens)]
+        
+        if not separators:
+            if tokens is None:
+                tokens = self.encoding.encode_ordinary(text)
+            # No natural boundary left: cut on token boundaries
+            return [
+                (self.encoding.decode(tokens[i:i + budget]), tokens[i:i + budget])
+                for i in range(0, len(tokens), budget)
+            ]
+        
+        separator, rest = separators[0], separators[1:]
+        if isinstance(separator, str):
+            parts = text.split(separator)
+            parts = [part for part in [p + separator for p in parts[:-1]] + parts[-1:] if part]
+        else:
+            parts = self._split_on_pattern(text, separator)
+        
+        # One call encodes every part, in parallel threads inside tiktoken
+        part_tokens = self.encoding.encode_ordinary_batch(parts, num_threads=ENCODE_THREADS)
+        
+        pieces = []
+        for part, tokens in zip(parts, part_tokens):
+            pieces.extend(self._split(part, rest, budget, tokens))
+        return pieces
+    
+    @staticmethod
+    def _split_on_pattern(text: str, pattern: Pattern[str]) -> List[str]:
+        """Split text after each match of pattern, keeping the matched text."""
+        parts = []
+        start = 0
+        for match in pattern.finditer(text):
+            parts.append(text[start:match.end()])
+            start = match.end()
+        if start < len(text):
+            parts.append(text[start:])
+        return parts
+    
+    @staticmethod
+    def _merge(pieces: List[Tuple[str, List[int]]], budget: int) -> List[Tuple[str, List[int]]]:
+        """Greedily merge adjacent pieces while they fit in budget."""
+        merged = []
+        current_parts: List[str] = []
+        current_tokens: List[int] = []
+        
+        for piece_text, piece_tokens in pieces:
+            if current_parts and len(current_tokens) + len(piece_tokens) > budget:
+                merged.append(("".join(current_parts), current_tokens))
+                current_parts = []
+                current_tokens = []
+            current_parts.append(piece_text)
+            current_tokens.extend(piece_tokens)
         
+        if current_parts:
+            merged.append(("".join(current_parts), current_tokens))
+        return merged
+    
+    def _merge_tiny(self, pieces: List[Tuple[str, List[int]]], limit: int) -> List[Tuple[str, List[int]]]:
+        """Fold chunks below MIN_CHUNK_TOKENS into a neighbor, so they don't cost an AI call of their own."""
+        result: List[Tuple[str, List[int]]] = []
+        for piece_text, piece_tokens in pieces:
+            if result:
+                previous_text, previous_tokens = result[-1]
+                is_tiny = len(piece_tokens) < self.MIN_CHUNK_TOKENS or len(previous_tokens) < self.MIN_CHUNK_TOKENS
+                if is_tiny and len(previous_tokens) + len(piece_tokens) <= limit:
+                    result[-1] = (previous_text + piece_text, previous_tokens + piece_tokens)
+                    continue
+            result.append((piece_text, piece_tokens))
+        return result
+    
+    def _create_chunk(self, text: str, chunk_index: int, token_count: int) -> dict:
+        """Create chunk dictionary."""
         return {
             "chunk_index": chunk_index,
             "text": text,
-            "token_count": tokens,
+            "token_count": token_count,
         }
     
-    def _get_overlap_text(self, text_parts: List[str], overlap_tokens: int) -> str:
-        """Get overlap text from end of chunk."""
-        if not text_parts:
-            return ""
-        
-        # Get last paragraph and encode
-        last_para = text_parts[-1]
-        encoded = self.encoding.encode(last_para)
-        
-        if len(encoded) <= overlap_tokens:
-            return last_para
+    def _get_overlap_text(self, tokens: List[int], overlap_tokens: int) -> Tuple[str, int]:
+        """Get overlap text (and its token count) from the previous chunk's token IDs."""
+        if not tokens or overlap_tokens <= 0:
+            return "", 0
         
         # Take last N tokens
-        overlap_encoded = encoded[-overlap_tokens:]
-        return self.encoding.decode(overlap_encoded)
-
+        overlap_encoded = tokens[-overlap_tokens:]
+        return self.encoding.decode(overlap_encoded), len(overlap_encoded)
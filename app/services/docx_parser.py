@@ -1,6 +1,7 @@
 """
 DOCX text extraction service.
 """
+import asyncio
 import io
 from docx import Document
 
@@ -24,21 +25,29 @@ class DOCXParser:
         Returns:
             Extracted text
         """
+        # Parsing is blocking, so it runs in a worker thread
+        return await asyncio.to_thread(DOCXParser._extract_text, docx_content)
+    
+    @staticmethod
+    def _extract_text(docx_content: bytes) -> str:
+        """Extract text from DOCX content (blocking)."""
         try:
             docx_file = io.BytesIO(docx_content)
             doc = Document(docx_file)
             
             text_parts = []
             
-            # Extract paragraphs
+            # Extract paragraphs (.text walks the paragraph's runs, so read it once)
             for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_parts.append(paragraph.text)
+                paragraph_text = paragraph.text
+                if paragraph_text.strip():
+                    text_parts.append(paragraph_text)
             
             # Extract tables
             for table in doc.tables:
                 for row in table.rows:
-                    row_text = " | ".join([cell.text.strip() for cell in row.cells if cell.text.strip()])
+                    cell_texts = (cell.text.strip() for cell in row.cells)
+                    row_text = " | ".join(cell_text for cell_text in cell_texts if cell_text)
                     if row_text:
                         text_parts.append(row_text)
             
@@ -2,6 +2,7 @@
 Email service using SendGrid.
 """
 from typing import Optional, List
+import asyncio
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, Email, To, Content
 
@@ -55,7 +56,8 @@ class EmailService:
             if text_content:
                 message.add_content(Content("text/plain", text_content))
             
-            response = self.client.send(message)
+            # The SendGrid client is blocking, so send from a worker thread
+            response = await asyncio.to_thread(self.client.send, message)
             
             if response.status_code in [200, 201, 202]:
                 logger.info(f"Email sent to {to_email}: {subject}")
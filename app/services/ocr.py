@@ -1,8 +1,10 @@
 """
 OCR service for scanned documents using Tesseract.
 """
-from typing import Optional
+from typing import Optional, Tuple, Union
+import asyncio
 import io
+import tempfile
 from PIL import Image
 import pytesseract
 from pdf2image import convert_from_bytes
@@ -13,6 +15,47 @@ from app.utils.errors import ProcessingError
 
 logger = setup_logger(__name__)
 
+# LSTM engine only, and treat each page as one block of text (skips layout analysis)
+TESSERACT_CONFIG = "--oem 1 --psm 6"
+
+# Pages OCR'd below OCR_MIN_CONFIDENCE are rendered again at this DPI
+OCR_RETRY_DPI = 300
+
+
+def _ocr_page(image: Union[str, Image.Image]) -> Tuple[str, float]:
+    """
+    OCR a single page image, or image file path (blocking).
+    
+    Returns:
+        Page text and Tesseract's mean word confidence (0-100; 100 if no words)
+    """
+    data = pytesseract.image_to_data(
+        image, lang="eng", config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT
+    )
+    
+    # Rebuild the text line by line, with a blank line between paragraphs
+    paragraphs = {}
+    confidences = []
+    for i, word in enumerate(data["text"]):
+        if not word.strip():
+            continue
+        paragraph = paragraphs.setdefault((data["block_num"][i], data["par_num"][i]), {})
+        paragraph.setdefault(data["line_num"][i], []).append(word)
+        confidence = float(data["conf"][i])
+        if confidence >= 0:
+            confidences.append(confidence)
+    
+    text = "\n\n".join(
+        "\n".join(" ".join(words) for words in lines.values())
+        for lines in paragraphs.values()
+    )
+    return text, sum(confidences) / len(confidences) if confidences else 100.0
+
+
+def _render_pages(pdf_content: bytes, dpi: int, **kwargs) -> list:
+    """Render PDF pages to grayscale images, or image file paths with paths_only (blocking)."""
+    return convert_from_bytes(pdf_content, dpi=dpi, grayscale=True, **kwargs)
+
 
 class OCRService:
     """Service for OCR text extraction from scanned PDFs."""
@@ -21,10 +64,13 @@ class OCRService:
         if settings.TESSERACT_CMD:
             pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
     
-    async def extract_text_from_pdf(self, pdf_content: bytes, dpi: int = 300) -> str:
+    async def extract_text_from_pdf(self, pdf_content: bytes, dpi: int = 200) -> str:
         """
         Extract text from scanned PDF using OCR.
         
+        Pages are rendered in grayscale at dpi; any page Tesseract reads
+        with low confidence is rendered and read again at OCR_RETRY_DPI.
+        
         Args:
             pdf_content: PDF file content as bytes
             dpi: DPI for image conversion (higher = better quality, slower)
@@ -33,23 +79,48 @@ class OCRService:
             Extracted text
         """
         try:
-            # Convert PDF pages to images
-            images = convert_from_bytes(pdf_content, dpi=dpi)
-            
-            text_parts = []
-            
-            for i, image in enumerate(images):
-                logger.info(f"Processing page {i + 1}/{len(images)} with OCR")
-                page_text = pytesseract.image_to_string(image, lang="eng")
-                if page_text.strip():
-                    text_parts.append(page_text)
+            with tempfile.TemporaryDirectory() as output_folder:
+                # Render pages to files (pdftoppm runs in subprocesses), so a
+                # long scan never sits in memory all at once; tesseract reads
+                # the files directly
+                page_paths = await asyncio.to_thread(
+                    _render_pages,
+                    pdf_content,
+                    dpi,
+                    output_folder=output_folder,
+                    paths_only=True,
+                    fmt="png",
+                    thread_count=settings.OCR_WORKERS,
+                )
+                page_texts = await self._ocr_pages(pdf_content, page_paths, dpi)
             
-            return "\n\n".join(text_parts)
+            return "\n\n".join(page_text for page_text in page_texts if page_text.strip())
             
         except Exception as e:
             logger.error(f"Error in OCR extraction: {e}")
             raise ProcessingError(f"OCR extraction failed: {str(e)}")
     
+    async def _ocr_pages(self, pdf_content: bytes, page_paths: list, dpi: int) -> list:
+        """OCR rendered pages, in parallel (each page is its own tesseract process)."""
+        semaphore = asyncio.Semaphore(settings.OCR_WORKERS)
+        
+        async def ocr_page(i: int, page_path: str) -> str:
+            async with semaphore:
+                logger.info(f"Processing page {i + 1}/{len(page_paths)} with OCR")
+                page_text, confidence = await asyncio.to_thread(_ocr_page, page_path)
+                
+                if confidence < settings.OCR_MIN_CONFIDENCE and dpi < OCR_RETRY_DPI:
+                    logger.info(f"Low OCR confidence on page {i + 1} ({confidence:.0f}), retrying at {OCR_RETRY_DPI} DPI")
+                    retry_images = await asyncio.to_thread(
+                        _render_pages, pdf_content, OCR_RETRY_DPI, first_page=i + 1, last_page=i + 1
+                    )
+                    if retry_images:
+                        page_text, _ = await asyncio.to_thread(_ocr_page, retry_images[0])
+                
+                return page_text
+        
+        return await asyncio.gather(*(ocr_page(i, page_path) for i, page_path in enumerate(page_paths)))
+    
     async def extract_text_from_image(self, image_content: bytes) -> str:
         """
         Extract text from image using OCR.
@@ -60,10 +131,12 @@ class OCRService:
         Returns:
             Extracted text
         """
-        try:
+        def _extract():
             image = Image.open(io.BytesIO(image_content))
-            text = pytesseract.image_to_string(image, lang="eng")
-            return text
+            return pytesseract.image_to_string(image, lang="eng")
+        
+        try:
+            return await asyncio.to_thread(_extract)
         except Exception as e:
             logger.error(f"Error in OCR image extraction: {e}")
             raise ProcessingError(f"OCR image extraction failed: {str(e)}")
@@ -1,7 +1,8 @@
 """
 PDF text extraction service.
 """
-from typing import Optional
+from typing import List, Optional, Tuple
+import asyncio
 import pdfplumber
 from PyPDF2 import PdfReader
 import io
@@ -15,64 +16,104 @@ logger = setup_logger(__name__)
 class PDFParser:
     """Service for extracting text from PDF files."""
     
+    # Below this, PyPDF2 likely missed text that pdfplumber's layout pass finds
+    MIN_CHARS_PER_PAGE = 200
+    
     @staticmethod
     async def extract_text(pdf_content: bytes) -> str:
         """
         Extract text from PDF content.
         
+        Parsing is blocking, so it runs in a worker thread.
+        
         Args:
             pdf_content: PDF file content as bytes
             
         Returns:
             Extracted text
         """
+        text, _ = await PDFParser.extract_text_with_meta(pdf_content)
+        return text
+    
+    @staticmethod
+    async def extract_text_with_meta(pdf_content: bytes) -> Tuple[str, bool]:
+        """
+        Extract text from PDF content, and tell whether it looks scanned.
+        
+        The scanned check reuses the extracted first page, so the PDF is
+        parsed once instead of once more just for is_scanned.
+        
+        Args:
+            pdf_content: PDF file content as bytes
+            
+        Returns:
+            Extracted text, and True if the PDF is likely scanned
+        """
+        return await asyncio.to_thread(PDFParser._extract_text_with_meta, pdf_content)
+    
+    @staticmethod
+    def _extract_text_with_meta(pdf_content: bytes) -> Tuple[str, bool]:
+        """Extract text and scanned flag from PDF content (blocking)."""
         try:
-            # Try pdfplumber first (better for complex PDFs)
-            text = await PDFParser._extract_with_pdfplumber(pdf_content)
-            if text and len(text.strip()) > 100:
-                return text
+            # Try PyPDF2 first: much faster than pdfplumber, and enough for
+            # born-digital PDFs
+            pypdf2_error = None
+            try:
+                pages = PDFParser._extract_with_pypdf2(pdf_content)
+            except ProcessingError as e:
+                pages, pypdf2_error = [], e
+            text = PDFParser._join_pages(pages)
             
-            # Fallback to PyPDF2
-            logger.info("Falling back to PyPDF2 for PDF extraction")
-            text = await PDFParser._extract_with_pypdf2(pdf_content)
-            return text
+            if len(text.strip()) <= 100 or not PDFParser._density_ok(text, len(pages)):
+                # Fallback to pdfplumber (better for complex PDFs)
+                logger.info("Falling back to pdfplumber for PDF extraction")
+                plumber_pages = PDFParser._extract_with_pdfplumber(pdf_content)
+                if not plumber_pages and pypdf2_error:
+                    raise pypdf2_error
+                plumber_text = PDFParser._join_pages(plumber_pages)
+                if len(plumber_text.strip()) >= len(text.strip()):
+                    pages, text = plumber_pages, plumber_text
+            
+            return text, PDFParser._looks_scanned(pages)
             
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {e}")
             raise ProcessingError(f"Failed to extract text from PDF: {str(e)}")
     
     @staticmethod
-    async def _extract_with_pdfplumber(pdf_content: bytes) -> str:
-        """Extract text using pdfplumber."""
+    def _density_ok(text: str, page_count: int) -> bool:
+        """Check that extracted text averages at least MIN_CHARS_PER_PAGE per page."""
+        return len(text) >= PDFParser.MIN_CHARS_PER_PAGE * max(page_count, 1)
+    
+    @staticmethod
+    def _join_pages(pages: List[str]) -> str:
+        """Join the non-empty page texts."""
+        return "\n\n".join(page_text for page_text in pages if page_text)
+    
+    @staticmethod
+    def _looks_scanned(pages: List[str]) -> bool:
+        """Check if extracted pages look like a scan (very little text on the first page)."""
+        return not pages or len(pages[0].strip()) < 50
+    
+    @staticmethod
+    def _extract_with_pdfplumber(pdf_content: bytes) -> List[str]:
+        """Extract each page's text using pdfplumber."""
         try:
             pdf_file = io.BytesIO(pdf_content)
-            text_parts = []
             
             with pdfplumber.open(pdf_file) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_parts.append(page_text)
-            
-            return "\n\n".join(text_parts)
+                return [page.extract_text() or "" for page in pdf.pages]
         except Exception as e:
             logger.warning(f"pdfplumber extraction failed: {e}")
-            return ""
+            return []
     
     @staticmethod
-    async def _extract_with_pypdf2(pdf_content: bytes) -> str:
-        """Extract text using PyPDF2."""
+    def _extract_with_pypdf2(pdf_content: bytes) -> List[str]:
+        """Extract each page's text using PyPDF2."""
         try:
             pdf_file = io.BytesIO(pdf_content)
             reader = PdfReader(pdf_file)
-            text_parts = []
-            
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    text_parts.append(text)
-            
-            return "\n\n".join(text_parts)
+            return [page.extract_text() or "" for page in reader.pages]
         except Exception as e:
             logger.error(f"PyPDF2 extraction failed: {e}")
             raise ProcessingError(f"Failed to extract text: {str(e)}")
@@ -80,6 +121,11 @@ class PDFParser:
     @staticmethod
     async def get_page_count(pdf_content: bytes) -> int:
         """Get number of pages in PDF."""
+        return await asyncio.to_thread(PDFParser._get_page_count, pdf_content)
+    
+    @staticmethod
+    def _get_page_count(pdf_content: bytes) -> int:
+        """Get number of pages in PDF (blocking)."""
         try:
             pdf_file = io.BytesIO(pdf_content)
             reader = PdfReader(pdf_file)
@@ -99,6 +145,11 @@ class PDFParser:
         Returns:
             True if likely scanned, False otherwise
         """
+        return await asyncio.to_thread(PDFParser._is_scanned, pdf_content)
+    
+    @staticmethod
+    def _is_scanned(pdf_content: bytes) -> bool:
+        """Check if PDF is scanned (blocking)."""
         try:
             # Extract text from first page
             pdf_file = io.BytesIO(pdf_content)
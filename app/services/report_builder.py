@@ -1,44 +1,113 @@
 """
 Report generation service (PDF and JSON).
 """
-from pathlib import Path
+import asyncio
+import functools
+import io
 from datetime import datetime
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib import colors
-
+from typing import Any, AsyncIterator, BinaryIO, Dict
+from xml.sax.saxutils import escape
 from app.models.document import Document
 from app.models.analysis import Analysis
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Size of the pieces a rendered PDF is streamed out in
+STREAM_CHUNK_SIZE = 64 * 1024
+
+@functools.lru_cache(maxsize=None)
+def _get_styles() -> Dict[str, Any]:
+    """
+    Build the report styles once per process.
+    
+    ReportLab is imported here rather than at module load, so processes
+    that never render a PDF don't pay for it; building the sample
+    stylesheet is slow too.
+    
+    Returns:
+        Dictionary of the stylesheet, paragraph and table styles
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+    
+    sheet = getSampleStyleSheet()
+    return {
+        "sheet": sheet,
+        "title": ParagraphStyle(
+            "CustomTitle",
+            parent=sheet["Heading1"],
+            fontSize=24,
+            textColor=colors.HexColor("#1E3A8A"),
+            spaceAfter=30,
+        ),
+        "doc_info_table": TableStyle([
+            ("BACKGROUND", (0, 0), (0, -1), colors.grey),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, 0), 12),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+            ("BACKGROUND", (1, 0), (1, -1), colors.beige),
+            ("GRID", (0, 0), (-1, -1), 1, colors.black),
+        ]),
+        # Risks: severity + title, description, recommendation
+        "risk_table": [
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
+        ],
+        # Severity shading of a risk row's first cell
+        "severity_backgrounds": {
+            "high": colors.HexColor("#FECACA"),
+            "medium": colors.HexColor("#FED7AA"),
+            "low": colors.HexColor("#FEF08A"),
+        },
+        # Dates and financial terms: label, value
+        "terms_table": TableStyle([
+            ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("LEFTPADDING", (0, 0), (-1, -1), 0),
+        ]),
+    }
+
 
 class ReportBuilder:
     """Service for generating PDF and JSON reports."""
     
-    def __init__(self):
-        self.reports_dir = Path("reports")
-        self.reports_dir.mkdir(exist_ok=True)
-    
-    async def generate_pdf(self, document: Document, analysis: Analysis) -> str:
+    async def stream_pdf(self, document: Document, analysis: Analysis) -> AsyncIterator[bytes]:
         """
-        Generate PDF report.
+        Generate PDF report in memory and yield it in chunks.
         
         Args:
             document: Document model
             analysis: Analysis model
             
-        Returns:
-            Path to generated PDF file
+        Yields:
+            Successive pieces of the PDF file
         """
-        pdf_path = self.reports_dir / f"{document.document_id}_report.pdf"
+        buffer = io.BytesIO()
+        await asyncio.to_thread(self._build_pdf, document, analysis, buffer)
+        
+        pdf = buffer.getbuffer()
+        try:
+            for start in range(0, len(pdf), STREAM_CHUNK_SIZE):
+                yield bytes(pdf[start:start + STREAM_CHUNK_SIZE])
+        finally:
+            pdf.release()
+    
+    def _build_pdf(self, document: Document, analysis: Analysis, target: BinaryIO) -> None:
+        """Lay out the report and write the PDF to a file object."""
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+        
+        report_styles = _get_styles()
+        styles = report_styles["sheet"]
         
         # Create PDF document
         doc = SimpleDocTemplate(
-            str(pdf_path),
+            target,
             pagesize=letter,
             rightMargin=72,
             leftMargin=72,
@@ -48,17 +117,9 @@ class ReportBuilder:
         
         # Build story (content)
         story = []
-        styles = getSampleStyleSheet()
         
         # Title
-        title_style = ParagraphStyle(
-            "CustomTitle",
-            parent=styles["Heading1"],
-            fontSize=24,
-            textColor=colors.HexColor("#1E3A8A"),
-            spaceAfter=30,
-        )
-        story.append(Paragraph("Legal Document Analysis Report", title_style))
+        story.append(Paragraph("Legal Document Analysis Report", report_styles["title"]))
         story.append(Spacer(1, 0.2 * inch))
         
         # Document Info
@@ -73,22 +134,13 @@ class ReportBuilder:
             doc_info.append(["Risk Score:", f"{document.risk_score}/10"])
         
         doc_table = Table(doc_info, colWidths=[2 * inch, 4 * inch])
-        doc_table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (0, -1), colors.grey),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("FONTSIZE", (0, 0), (-1, 0), 12),
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-            ("BACKGROUND", (1, 0), (1, -1), colors.beige),
-            ("GRID", (0, 0), (-1, -1), 1, colors.black),
-        ]))
+        doc_table.setStyle(report_styles["doc_info_table"])
         story.append(doc_table)
         story.append(Spacer(1, 0.3 * inch))
         
         # Executive Summary
         story.append(Paragraph("<b>Executive Summary</b>", styles["Heading2"]))
-        story.append(Paragraph(analysis.summary, styles["Normal"]))
+        story.append(Paragraph(escape(analysis.summary), styles["Normal"]))
         story.append(Spacer(1, 0.3 * inch))
         
         # Risk Analysis
@@ -100,19 +152,26 @@ class ReportBuilder:
         ))
         story.append(Spacer(1, 0.2 * inch))
         
-        # Risk Items
-        for risk in analysis.risks[:10]:  # Limit to top 10
-            severity_color = {
-                "high": colors.red,
-                "medium": colors.orange,
-                "low": colors.yellow,
-            }.get(risk.severity.lower(), colors.black)
+        # Risk Items, as one table rather than several flowables per risk
+        risks = analysis.risks[:10]  # Limit to top 10
+        if risks:
+            risk_rows = []
+            risk_table_style = list(report_styles["risk_table"])
+            for row, risk in enumerate(risks):
+                risk_rows.append([
+                    Paragraph(f"<b>[{escape(risk.severity.upper())}]</b> {escape(risk.title)}", styles["Normal"]),
+                    Paragraph(escape(risk.description), styles["Normal"]),
+                    Paragraph(f"<i>Recommendation: {escape(risk.recommendation)}</i>", styles["Normal"]) if risk.recommendation else "",
+                ])
+                background = report_styles["severity_backgrounds"].get(risk.severity.lower())
+                if background is not None:
+                    risk_table_style.append(("BACKGROUND", (0, row), (0, row), background))
             
-            risk_text = f"<b>[{risk.severity.upper()}]</b> {risk.title}"
-            story.append(Paragraph(risk_text, styles["Normal"]))
-            story.append(Paragraph(risk.description, styles["Normal"]))
-            if risk.recommendation:
-                story.append(Paragraph(f"<i>Recommendation: {risk.recommendation}</i>", styles["Normal"]))
+            story.append(Table(
+                risk_rows,
+                colWidths=[1.5 * inch, 3 * inch, 2 * inch],
+                style=TableStyle(risk_table_style),
+            ))
             story.append(Spacer(1, 0.1 * inch))
         
         story.append(PageBreak())
@@ -123,39 +182,46 @@ class ReportBuilder:
         # Parties
         if analysis.parties:
             story.append(Paragraph("<b>Parties Involved</b>", styles["Heading3"]))
-            for party in analysis.parties:
-                story.append(Paragraph(f"• {party.name} ({party.role})", styles["Normal"]))
+            # One paragraph for the whole list, so its markup is parsed once
+            story.append(Paragraph(
+                "<br/>".join(f"• {escape(party.name)} ({escape(party.role)})" for party in analysis.parties),
+                styles["Normal"],
+            ))
             story.append(Spacer(1, 0.2 * inch))
         
         # Dates
         if analysis.dates:
             story.append(Paragraph("<b>Important Dates</b>", styles["Heading3"]))
-            for date_item in analysis.dates[:10]:  # Top 10
-                story.append(Paragraph(
-                    f"• {date_item.type}: {date_item.date}",
-                    styles["Normal"]
-                ))
+            story.append(Table(
+                [[date_item.type, date_item.date] for date_item in analysis.dates[:10]],  # Top 10
+                colWidths=[2.5 * inch, 4 * inch],
+                style=report_styles["terms_table"],
+                hAlign="LEFT",
+            ))
             story.append(Spacer(1, 0.2 * inch))
         
         # Financial Terms
         if analysis.financial_terms:
             story.append(Paragraph("<b>Financial Terms</b>", styles["Heading3"]))
-            for term in analysis.financial_terms[:10]:  # Top 10
-                story.append(Paragraph(
-                    f"• {term.type}: {term.currency} {term.amount:,.2f}",
-                    styles["Normal"]
-                ))
+            story.append(Table(
+                [
+                    [term.type, f"{term.currency} {term.amount:,.2f}"]
+                    for term in analysis.financial_terms[:10]  # Top 10
+                ],
+                colWidths=[2.5 * inch, 4 * inch],
+                style=report_styles["terms_table"],
+                hAlign="LEFT",
+            ))
             story.append(Spacer(1, 0.2 * inch))
         
         # Missing Clauses
         if analysis.missing_clauses:
             story.append(Paragraph("<b>Missing Standard Clauses</b>", styles["Heading3"]))
-            for clause in analysis.missing_clauses:
-                story.append(Paragraph(f"• {clause}", styles["Normal"]))
+            story.append(Paragraph(
+                "<br/>".join(f"• {escape(clause)}" for clause in analysis.missing_clauses),
+                styles["Normal"],
+            ))
         
         # Build PDF
         doc.build(story)
-        
-        logger.info(f"Generated PDF report: {pdf_path}")
-        return str(pdf_path)
 
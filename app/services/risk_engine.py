@@ -1,6 +1,8 @@
 """
 Risk scoring engine for legal documents.
 """
+import functools
+from collections import Counter
 from typing import List, Dict, Any
 from app.models.analysis import RiskItem
 
@@ -8,6 +10,23 @@ from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Characters ignored when comparing clause names
+_CLAUSE_NAME_SEPARATORS = str.maketrans("", "", " -_")
+
+# Sort order of severities (unknown severities sort last)
+_PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+
+def _risk_priority(risk: RiskItem) -> int:
+    """Get a risk's sort position by severity."""
+    return _PRIORITY_ORDER.get(risk.severity.lower(), 3)
+
+
+@functools.lru_cache(maxsize=1024)
+def _normalize_clause_name(clause_name: str) -> str:
+    """Normalize clause name for comparison."""
+    return clause_name.lower().translate(_CLAUSE_NAME_SEPARATORS)
+
 
 class RiskEngine:
     """Service for calculating risk scores and identifying risks."""
@@ -49,6 +68,12 @@ class RiskEngine:
         ],
     }
     
+    # Standard clauses paired with their normalized names, computed once
+    _NORMALIZED_STANDARD_CLAUSES = {
+        document_type: tuple((clause, _normalize_clause_name(clause)) for clause in clauses)
+        for document_type, clauses in STANDARD_CLAUSES.items()
+    }
+    
     def calculate_overall_risk_score(self, risks: List[RiskItem]) -> int:
         """
         Calculate overall risk score (0-10) from risk items.
@@ -59,14 +84,10 @@ class RiskEngine:
         Returns:
             Risk score from 0-10
         """
-        if not risks:
-            return 0
+        counts = self._severity_counts(risks)
         
-        total_weight = 0
-        for risk in risks:
-            severity = risk.severity.lower()
-            weight = self.RISK_WEIGHTS.get(severity, 1)
-            total_weight += weight
+        # Severities other than high/medium/low weigh as low
+        total_weight = sum(self.RISK_WEIGHTS.get(severity, 1) * count for severity, count in counts.items())
         
         # Normalize to 0-10 scale
         # Max possible: all high risks (3 each)
@@ -75,9 +96,12 @@ class RiskEngine:
             return 0
         
         max_possible = len(risks) * 3
-        score = min(10, int((total_weight / max_possible) * 10))
-        
-        return score
+        return min(10, (total_weight * 10) // max_possible)
+    
+    @staticmethod
+    def _severity_counts(risks: List[RiskItem]) -> Counter:
+        """Count risks by lowercased severity, in one pass."""
+        return Counter(risk.severity.lower() for risk in risks)
     
     def identify_missing_clauses(
         self,
@@ -94,24 +118,22 @@ class RiskEngine:
         Returns:
             List of missing standard clauses
         """
-        standard_clauses = self.STANDARD_CLAUSES.get(document_type.lower(), [])
+        standard_clauses = self._NORMALIZED_STANDARD_CLAUSES.get(document_type.lower(), ())
         
         # Normalize for comparison (lowercase, remove special chars)
-        extracted_normalized = [
+        extracted_normalized = {
             self._normalize_clause_name(clause) for clause in extracted_clauses
-        ]
+        }
         
-        missing = []
-        for standard_clause in standard_clauses:
-            normalized = self._normalize_clause_name(standard_clause)
-            if normalized not in extracted_normalized:
-                missing.append(standard_clause)
-        
-        return missing
+        return [
+            standard_clause
+            for standard_clause, normalized in standard_clauses
+            if normalized not in extracted_normalized
+        ]
     
     def _normalize_clause_name(self, clause_name: str) -> str:
         """Normalize clause name for comparison."""
-        return clause_name.lower().replace(" ", "").replace("-", "").replace("_", "")
+        return _normalize_clause_name(clause_name)
     
     def prioritize_risks(self, risks: List[RiskItem]) -> List[RiskItem]:
         """
@@ -123,12 +145,7 @@ class RiskEngine:
         Returns:
             Sorted list of risks
         """
-        priority_order = {"high": 0, "medium": 1, "low": 2}
-        
-        return sorted(
-            risks,
-            key=lambda r: priority_order.get(r.severity.lower(), 3),
-        )
+        return sorted(risks, key=_risk_priority)
     
     def get_risk_summary(self, risks: List[RiskItem]) -> Dict[str, int]:
         """
@@ -140,12 +157,5 @@ class RiskEngine:
         Returns:
             Dictionary with counts by severity
         """
-        summary = {"high": 0, "medium": 0, "low": 0}
-        
-        for risk in risks:
-            severity = risk.severity.lower()
-            if severity in summary:
-                summary[severity] += 1
-        
-        return summary
-
+        counts = self._severity_counts(risks)
+        return {"high": counts["high"], "medium": counts["medium"], "low": counts["low"]}
@@ -1,7 +1,10 @@
 """
 File storage service for S3 and Cloudflare R2.
 """
-import aiofiles
+import asyncio
+import functools
+import io
+import re
 from typing import BinaryIO, Optional
 from pathlib import Path
 import uuid
@@ -12,6 +15,75 @@ from app.utils.logger import setup_logger
 logger = setup_logger(__name__)
 
 
+# HTTP connections each process's S3 client may keep open; calls run in
+# worker threads, so this bounds how many can be in flight at once
+S3_MAX_POOL_CONNECTIONS = 50
+
+# Uploads of at least this many bytes are sent as parallel multipart uploads
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+
+# Most keys S3's DeleteObjects accepts in one request
+DELETE_BATCH_SIZE = 1000
+
+# Content types of the supported file extensions
+_CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".doc": "application/msword",
+    ".txt": "text/plain",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _get_s3_client(storage_type: str):
+    """
+    Create the S3/R2 client once per process.
+    
+    boto3 clients are thread-safe, so every StorageService shares one
+    client and its connection pool instead of building its own.
+    """
+    import boto3
+    from botocore.config import Config
+    
+    config = Config(signature_version="s3v4", max_pool_connections=S3_MAX_POOL_CONNECTIONS)
+    
+    if storage_type == "s3":
+        if not settings.AWS_ACCESS_KEY_ID or not settings.AWS_SECRET_ACCESS_KEY:
+            raise ValueError("AWS credentials not configured")
+        
+        return boto3.client(
+            "s3",
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION,
+            config=config,
+        )
+    elif storage_type == "r2":
+        if not settings.R2_ACCESS_KEY_ID or not settings.R2_SECRET_ACCESS_KEY:
+            raise ValueError("R2 credentials not configured")
+        
+        return boto3.client(
+            "s3",
+            endpoint_url=settings.R2_ENDPOINT_URL,
+            aws_access_key_id=settings.R2_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.R2_SECRET_ACCESS_KEY,
+            region_name="auto",
+            config=config,
+        )
+    else:
+        raise ValueError(f"Unsupported storage type: {storage_type}")
+
+
+@functools.lru_cache(maxsize=None)
+def _file_key_pattern(bucket_name: str) -> re.Pattern:
+    """Compile the pattern capturing the file key of a bucket's S3/R2 URLs."""
+    bucket = re.escape(bucket_name)
+    hosts = r"(?:[^/]*\.)?(?:amazonaws\.com|r2\.cloudflarestorage\.com)"
+    return re.compile(
+        rf"^https?://(?:{bucket}\.{hosts}/|{hosts}/{bucket}/)(.+)$"
+    )
+
+
 class StorageService:
     """Service for file storage (S3 or R2)."""
     
@@ -19,37 +91,23 @@ class StorageService:
         self.storage_type = settings.STORAGE_TYPE
         self.bucket_name = settings.S3_BUCKET_NAME if self.storage_type == "s3" else settings.R2_BUCKET_NAME
         
+        self.s3_client = _get_s3_client(self.storage_type)
+        
+        # Public URL of a file key, filled in with str.format
         if self.storage_type == "s3":
-            import boto3
-            from botocore.config import Config
-            
-            if not settings.AWS_ACCESS_KEY_ID or not settings.AWS_SECRET_ACCESS_KEY:
-                raise ValueError("AWS credentials not configured")
-            
-            self.s3_client = boto3.client(
-                "s3",
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_REGION,
-                config=Config(signature_version="s3v4"),
-            )
-        elif self.storage_type == "r2":
-            import boto3
-            from botocore.config import Config
-            
-            if not settings.R2_ACCESS_KEY_ID or not settings.R2_SECRET_ACCESS_KEY:
-                raise ValueError("R2 credentials not configured")
-            
-            self.s3_client = boto3.client(
-                "s3",
-                endpoint_url=settings.R2_ENDPOINT_URL,
-                aws_access_key_id=settings.R2_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.R2_SECRET_ACCESS_KEY,
-                region_name="auto",
-                config=Config(signature_version="s3v4"),
-            )
+            self._url_template = f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/{{key}}"
         else:
-            raise ValueError(f"Unsupported storage type: {self.storage_type}")
+            # R2 public URL (adjust based on your R2 setup)
+            self._url_template = f"https://{self.bucket_name}.r2.cloudflarestorage.com/{{key}}"
+        
+        from boto3.s3.transfer import TransferConfig
+        
+        # 8MB parts, up to 8 in flight per upload
+        self._transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_THRESHOLD,
+            max_concurrency=8,
+        )
     
     async def upload_file(
         self,
@@ -66,92 +124,295 @@ class StorageService:
             file_name: Original file name
             user_id: User ID for folder organization
             folder: Storage folder (default: "documents")
-            
+        
         Returns:
             File URL/path in storage
         """
-        import asyncio
-        
-        # Generate unique file key
         file_extension = Path(file_name).suffix
-        unique_id = str(uuid.uuid4())
-        file_key = f"{folder}/{user_id}/{unique_id}{file_extension}"
+        file_key = self._new_file_key(file_extension, user_id, folder)
+        content_type = self._get_content_type(file_extension)
+        
+        if len(file_content) >= MULTIPART_THRESHOLD:
+            # Large files go up in parts over several connections
+            upload = functools.partial(
+                self.s3_client.upload_fileobj,
+                io.BytesIO(file_content),
+                self.bucket_name,
+                file_key,
+                ExtraArgs={"ContentType": content_type},
+                Config=self._transfer_config,
+            )
+        else:
+            upload = functools.partial(
+                self.s3_client.put_object,
+                Bucket=self.bucket_name,
+                Key=file_key,
+                Body=file_content,
+                ContentType=content_type,
+            )
         
         try:
             # Upload to S3/R2 (boto3 is sync, so we run in executor)
-            def _upload():
-                self.s3_client.put_object(
-                    Bucket=self.bucket_name,
-                    Key=file_key,
-                    Body=file_content,
-                    ContentType=self._get_content_type(file_extension),
-                )
-            
-            await asyncio.to_thread(_upload)
-            
-            # Generate URL
-            if self.storage_type == "s3":
-                file_url = f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/{file_key}"
-            else:
-                # R2 public URL (adjust based on your R2 setup)
-                file_url = f"https://{self.bucket_name}.r2.cloudflarestorage.com/{file_key}"
+            await asyncio.to_thread(upload)
             
             logger.info(f"File uploaded: {file_key}")
-            return file_url
+            return self._file_url(file_key)
+        
+        except Exception as e:
+            logger.error(f"Error uploading file: {e}")
+            raise
+    
+    async def upload_fileobj(
+        self,
+        fileobj: BinaryIO,
+        file_name: str,
+        user_id: str,
+        folder: str = "documents",
+    ) -> str:
+        """
+        Upload a file object to storage without reading it into memory.
+        
+        Large files are sent as a multipart upload, with parts read from
+        fileobj and uploaded concurrently.
+        
+        Args:
+            fileobj: Readable binary file object, positioned at the start
+            file_name: Original file name
+            user_id: User ID for folder organization
+            folder: Storage folder (default: "documents")
+        
+        Returns:
+            File URL/path in storage
+        """
+        file_extension = Path(file_name).suffix
+        file_key = self._new_file_key(file_extension, user_id, folder)
+        
+        try:
+            # boto3 is sync, so we run in executor
+            await asyncio.to_thread(
+                self.s3_client.upload_fileobj,
+                fileobj,
+                self.bucket_name,
+                file_key,
+                ExtraArgs={"ContentType": self._get_content_type(file_extension)},
+                Config=self._transfer_config,
+            )
             
+            logger.info(f"File uploaded: {file_key}")
+            return self._file_url(file_key)
+        
         except Exception as e:
             logger.error(f"Error uploading file: {e}")
             raise
     
+    def create_upload_url(
+        self,
+        file_name: str,
+        user_id: str,
+        max_size: int,
+        folder: str = "uploads",
+        expires_in: int = 900,
+    ) -> dict:
+        """
+        Reserve a file key and presign a direct POST upload to it.
+        
+        Storage itself rejects uploads larger than max_size. The key stays
+        writable until the URL expires, so nothing should read it without
+        first copying it elsewhere (see copy_file).
+        
+        Args:
+            file_name: Original file name
+            user_id: User ID for folder organization
+            max_size: Largest accepted upload in bytes
+            folder: Storage folder (default: "uploads")
+            expires_in: Seconds the upload URL stays valid
+        
+        Returns:
+            Dictionary with file_key, file_url, upload_url, upload_fields
+            and content_type
+        """
+        file_extension = Path(file_name).suffix
+        file_key = self._new_file_key(file_extension, user_id, folder)
+        content_type = self._get_content_type(file_extension)
+        
+        # Signing is local, no request is made
+        post = self.s3_client.generate_presigned_post(
+            Bucket=self.bucket_name,
+            Key=file_key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_size],
+            ],
+            ExpiresIn=expires_in,
+        )
+        return {
+            "file_key": file_key,
+            "file_url": self._file_url(file_key),
+            "upload_url": post["url"],
+            "upload_fields": post["fields"],
+            "content_type": content_type,
+        }
+    
+    async def copy_file(self, file_key: str, user_id: str, folder: str = "documents") -> Optional[str]:
+        """
+        Copy a stored file to a new key, within storage.
+        
+        Args:
+            file_key: File key/path to copy
+            user_id: User ID for folder organization
+            folder: Storage folder of the copy (default: "documents")
+        
+        Returns:
+            File URL of the copy, or None if the file doesn't exist
+        """
+        new_key = self._new_file_key(Path(file_key).suffix, user_id, folder)
+        if not await asyncio.to_thread(self._copy_object, file_key, new_key):
+            return None
+        
+        logger.info(f"File copied: {file_key} -> {new_key}")
+        return self._file_url(new_key)
+    
+    def _copy_object(self, file_key: str, new_key: str) -> bool:
+        """Copy a stored file, returning False if it doesn't exist (blocking)."""
+        from botocore.exceptions import ClientError
+        
+        try:
+            self.s3_client.copy_object(
+                Bucket=self.bucket_name,
+                Key=new_key,
+                CopySource={"Bucket": self.bucket_name, "Key": file_key},
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+    
+    async def get_file_size(self, file_key: str) -> Optional[int]:
+        """
+        Get the size of a stored file.
+        
+        Args:
+            file_key: File key/path in storage
+        
+        Returns:
+            Size in bytes, or None if the file doesn't exist
+        """
+        return await asyncio.to_thread(self._head_size, file_key)
+    
+    def _head_size(self, file_key: str) -> Optional[int]:
+        """Look up a stored file's size (blocking)."""
+        from botocore.exceptions import ClientError
+        
+        try:
+            return self.s3_client.head_object(Bucket=self.bucket_name, Key=file_key)["ContentLength"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+    
+    def _new_file_key(self, file_extension: str, user_id: str, folder: str) -> str:
+        """Generate unique file key."""
+        return f"{folder}/{user_id}/{uuid.uuid4()}{file_extension}"
+    
+    def _file_url(self, file_key: str) -> str:
+        """Build the public URL for a file key."""
+        return self._url_template.format(key=file_key)
+    
     async def download_file(self, file_key: str) -> bytes:
         """
         Download file from storage.
         
         Args:
             file_key: File key/path in storage
-            
+        
         Returns:
             File content as bytes
         """
         try:
-            import asyncio
             # boto3 is sync, so we run in executor
-            def _download():
-                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=file_key)
-                return response["Body"].read()
-            
-            return await asyncio.to_thread(_download)
+            return await asyncio.to_thread(self._read_object, file_key)
         except Exception as e:
             logger.error(f"Error downloading file: {e}")
             raise
     
+    async def download_file_header(self, file_key: str, length: int) -> bytes:
+        """
+        Download only the leading bytes of a stored file.
+        
+        Args:
+            file_key: File key/path in storage
+            length: Number of bytes to read (must be positive)
+        
+        Returns:
+            Up to length bytes from the start of the file
+        """
+        try:
+            return await asyncio.to_thread(self._read_object, file_key, f"bytes=0-{length - 1}")
+        except Exception as e:
+            logger.error(f"Error downloading file header: {e}")
+            raise
+    
+    def _read_object(self, file_key: str, byte_range: Optional[str] = None) -> bytes:
+        """Fetch a stored file's content, or a byte range of it (blocking)."""
+        kwargs = {"Range": byte_range} if byte_range else {}
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=file_key, **kwargs)
+        return response["Body"].read()
+    
     async def delete_file(self, file_key: str) -> bool:
         """
         Delete file from storage.
         
         Args:
             file_key: File key/path in storage
-            
+        
         Returns:
             True if deleted, False otherwise
         """
-        try:
-            self.s3_client.delete_object(Bucket=self.bucket_name, Key=file_key)
-            logger.info(f"File deleted: {file_key}")
-            return True
-        except Exception as e:
-            logger.error(f"Error deleting file: {e}")
-            return False
+        results = await self.delete_files([file_key])
+        return results[file_key]
+    
+    async def delete_files(self, file_keys: list[str]) -> dict[str, bool]:
+        """
+        Delete many files from storage, up to 1000 keys per request.
+        
+        Args:
+            file_keys: File keys/paths in storage
+        
+        Returns:
+            Dictionary mapping each key to True if deleted, False otherwise
+        """
+        results = dict.fromkeys(file_keys, True)
+        keys = list(results)
+        
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[start:start + DELETE_BATCH_SIZE]
+            try:
+                # boto3 is sync, so we run in executor
+                response = await asyncio.to_thread(
+                    self.s3_client.delete_objects,
+                    Bucket=self.bucket_name,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
+            except Exception as e:
+                logger.error(f"Error deleting files: {e}")
+                results.update(dict.fromkeys(batch, False))
+                continue
+            
+            # Quiet mode only reports the keys that failed
+            for error in response.get("Errors", []):
+                logger.error(f"Error deleting file {error.get('Key')}: {error.get('Message')}")
+                results[error.get("Key")] = False
+        
+        deleted = sum(results.values())
+        if deleted:
+            logger.info(f"Files deleted: {deleted}/{len(results)}")
+        return results
     
     def _get_content_type(self, extension: str) -> str:
         """Get content type from file extension."""
-        content_types = {
-            ".pdf": "application/pdf",
-            ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            ".doc": "application/msword",
-            ".txt": "text/plain",
-        }
-        return content_types.get(extension.lower(), "application/octet-stream")
+        return _CONTENT_TYPES.get(extension.lower(), "application/octet-stream")
     
     def extract_file_key_from_url(self, file_url: str) -> str:
         """
@@ -159,20 +420,11 @@ class StorageService:
         
         Args:
             file_url: Full file URL
-            
+        
         Returns:
             File key/path
         """
-        # Extract key from URL (remove domain and bucket)
-        if "s3.amazonaws.com" in file_url or "r2.cloudflarestorage.com" in file_url:
-            parts = file_url.split("/")
-            # Find the bucket name index and get everything after
-            try:
-                bucket_index = parts.index(self.bucket_name)
-                return "/".join(parts[bucket_index + 1:])
-            except ValueError:
-                # Fallback: try to extract from common patterns
-                if "/" in file_url:
-                    return file_url.split(f"{self.bucket_name}/")[-1]
-        return file_url
+        # Virtual-hosted (bucket in the host) or path-style (bucket first in the path)
+        match = _file_key_pattern(self.bucket_name).match(file_url)
+        return match.group(1) if match else file_url
 
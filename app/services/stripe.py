@@ -1,16 +1,31 @@
 """
 Stripe payment and subscription service.
 """
-import stripe
+import asyncio
+import functools
+import orjson
 from typing import Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 
 from app.config import settings
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+
+@functools.lru_cache(maxsize=None)
+def get_stripe():
+    """
+    Import and configure the Stripe SDK on first use.
+    
+    The SDK is slow to import, so processes that never call Stripe skip it.
+    """
+    import stripe
+    
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    # Pooled requests sessions, so API calls reuse keep-alive connections
+    stripe.default_http_client = stripe.RequestsClient(timeout=10)
+    return stripe
 
 
 class StripeService:
@@ -43,7 +58,9 @@ class StripeService:
             Stripe customer ID
         """
         try:
-            customer = stripe.Customer.create(
+            # The Stripe client is blocking, so call it from a worker thread
+            customer = await asyncio.to_thread(
+                get_stripe().Customer.create,
                 email=email,
                 name=name,
                 metadata={"user_id": user_id},
@@ -83,14 +100,14 @@ class StripeService:
             if payment_method_id:
                 subscription_data["default_payment_method"] = payment_method_id
             
-            subscription = stripe.Subscription.create(**subscription_data)
+            subscription = await asyncio.to_thread(get_stripe().Subscription.create, **subscription_data)
             
             return {
                 "subscription_id": subscription.id,
                 "customer_id": subscription.customer,
                 "status": subscription.status,
-                "current_period_start": datetime.fromtimestamp(subscription.current_period_start),
-                "current_period_end": datetime.fromtimestamp(subscription.current_period_end),
+                "current_period_start": datetime.fromtimestamp(subscription.current_period_start, tz=timezone.utc),
+                "current_period_end": datetime.fromtimestamp(subscription.current_period_end, tz=timezone.utc),
                 "plan": plan,
             }
         except Exception as e:
@@ -108,7 +125,8 @@ class StripeService:
             Portal URL
         """
         try:
-            session = stripe.billing_portal.Session.create(
+            session = await asyncio.to_thread(
+                get_stripe().billing_portal.Session.create,
                 customer=customer_id,
                 return_url=f"{settings.API_BASE_URL}/billing",
             )
@@ -128,14 +146,13 @@ class StripeService:
         Returns:
             Event data
         """
+        stripe = get_stripe()
         try:
-            event = stripe.Webhook.construct_event(
-                payload,
-                signature,
-                settings.STRIPE_WEBHOOK_SECRET,
-            )
+            # Signature check and payload parsing are CPU-bound; keep them off the event loop
+            event = await asyncio.to_thread(self._verify_and_parse_event, payload, signature)
             
             return {
+                "id": event["id"],
                 "type": event["type"],
                 "data": event["data"],
             }
@@ -146,6 +163,30 @@ class StripeService:
             logger.error(f"Invalid webhook signature: {e}")
             raise
     
+    @staticmethod
+    def _verify_and_parse_event(payload: bytes, signature: str) -> Dict[str, Any]:
+        """
+        Verify a webhook signature and parse the event as a plain dict.
+        
+        Does what stripe.Webhook.construct_event does, minus building a
+        StripeObject graph the handlers never use.
+        
+        Raises:
+            stripe.error.SignatureVerificationError: If the signature is invalid
+            ValueError: If the payload isn't valid JSON
+        """
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8")
+        
+        stripe = get_stripe()
+        stripe.WebhookSignature.verify_header(
+            payload,
+            signature,
+            settings.STRIPE_WEBHOOK_SECRET,
+            tolerance=stripe.Webhook.DEFAULT_TOLERANCE,
+        )
+        return orjson.loads(payload)
+    
     def get_plan_limits(self, plan: str) -> int:
         """Get monthly document limit for plan."""
         return self.PLAN_LIMITS.get(plan, 20)
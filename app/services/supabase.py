@@ -1,14 +1,22 @@
 """
 Supabase authentication service.
 """
+import asyncio
+import hashlib
+import time
 import httpx
-from typing import Optional, Dict, Any
+import jwt
+from typing import Awaitable, Callable, Dict, Any, Hashable, Optional
 
 from app.config import settings
+from app.utils.cache import TTLCache
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Seconds a Supabase answer is reused before asking again
+SUPABASE_CACHE_TTL = 60
+
 
 class SupabaseService:
     """Service for interacting with Supabase Auth API."""
@@ -17,6 +25,45 @@ class SupabaseService:
         self.url = settings.SUPABASE_URL
         self.anon_key = settings.SUPABASE_ANON_KEY
         self.service_role_key = settings.SUPABASE_SERVICE_ROLE_KEY
+        # One pooled client, so calls reuse open (keep-alive) connections
+        self._client = httpx.AsyncClient(
+            base_url=self.url,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=10.0,
+        )
+        # Successful lookups, so repeat requests skip the HTTP round trip
+        self._token_cache = TTLCache(maxsize=10_000, ttl=SUPABASE_CACHE_TTL)
+        self._user_cache = TTLCache(maxsize=10_000, ttl=SUPABASE_CACHE_TTL)
+        # Lookups in flight, so concurrent misses for one key share a request
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+    
+    async def _cached(
+        self,
+        cache: TTLCache,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+        ttl: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Get a cached lookup, or run loader once for all concurrent callers (None results aren't cached)."""
+        value = cache.get(key)
+        if value is not None:
+            return value
+        
+        inflight_key = (id(cache), key)
+        inflight = self._inflight.get(inflight_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        
+        future = asyncio.ensure_future(loader())
+        self._inflight[inflight_key] = future
+        try:
+            value = await asyncio.shield(future)
+        finally:
+            self._inflight.pop(inflight_key, None)
+        
+        if value is not None:
+            cache.set(key, value, ttl=ttl)
+        return value
     
     async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -28,22 +75,24 @@ class SupabaseService:
         Returns:
             User data or None if not found
         """
+        return await self._cached(self._user_cache, user_id, lambda: self._fetch_user(user_id))
+    
+    async def _fetch_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch user from Supabase Auth."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.url}/auth/v1/admin/users/{user_id}",
-                    headers={
-                        "apikey": self.service_role_key,
-                        "Authorization": f"Bearer {self.service_role_key}",
-                    },
-                    timeout=10.0,
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    logger.warning(f"Failed to get user from Supabase: {response.status_code}")
-                    return None
+            response = await self._client.get(
+                f"/auth/v1/admin/users/{user_id}",
+                headers={
+                    "apikey": self.service_role_key,
+                    "Authorization": f"Bearer {self.service_role_key}",
+                },
+            )
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                logger.warning(f"Failed to get user from Supabase: {response.status_code}")
+                return None
         except Exception as e:
             logger.error(f"Error fetching user from Supabase: {e}")
             return None
@@ -58,22 +107,37 @@ class SupabaseService:
         Returns:
             Token payload or None if invalid
         """
+        # Never reuse a verification past the token's own expiry
+        ttl = None
+        try:
+            exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+            if exp:
+                ttl = exp - time.time()
+        except Exception:
+            pass
+        
+        cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        return await self._cached(self._token_cache, cache_key, lambda: self._fetch_token_user(token), ttl=ttl)
+    
+    async def _fetch_token_user(self, token: str) -> Optional[Dict[str, Any]]:
+        """Verify JWT token with a Supabase request."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.url}/auth/v1/user",
-                    headers={
-                        "apikey": self.anon_key,
-                        "Authorization": f"Bearer {token}",
-                    },
-                    timeout=10.0,
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    return None
+            response = await self._client.get(
+                "/auth/v1/user",
+                headers={
+                    "apikey": self.anon_key,
+                    "Authorization": f"Bearer {token}",
+                },
+            )
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                return None
         except Exception as e:
             logger.error(f"Error verifying token with Supabase: {e}")
             return None
-
+    
+    async def close(self) -> None:
+        """Close the pooled HTTP client."""
+        await self._client.aclose()
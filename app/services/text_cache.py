@@ -0,0 +1,57 @@
+"""
+Cache of extracted document text, keyed by file content.
+"""
+import hashlib
+from typing import Optional
+import zstandard
+
+from app.config import settings
+from app.services.cache import cache
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class TextCache:
+    """
+    Extracted text in Redis, zstd-compressed, keyed by the SHA-256 of the
+    file bytes, so re-analyzing the same file skips PDF/DOCX parsing and OCR.
+    
+    Like RedisCache, Redis errors never fail a request.
+    """
+    
+    KEY_PREFIX = "text:"
+    
+    def __init__(self, redis=None):
+        # Share the connection pool of the JSON cache
+        self.redis = redis or cache.redis
+        self._compressor = zstandard.ZstdCompressor()
+        self._decompressor = zstandard.ZstdDecompressor()
+    
+    @staticmethod
+    def key_for(content: bytes) -> str:
+        """Get the cache key for file content."""
+        return hashlib.sha256(content).hexdigest()
+    
+    async def get(self, key: str) -> Optional[str]:
+        """Get cached text, or None if missing (or Redis is unavailable)."""
+        try:
+            cached = await self.redis.get(self.KEY_PREFIX + key)
+            if cached is not None:
+                return self._decompressor.decompress(cached).decode("utf-8")
+        except Exception as e:
+            logger.warning(f"Text cache read failed for {key}: {e}")
+        return None
+    
+    async def set(self, key: str, text: str) -> None:
+        """Cache extracted text for TEXT_CACHE_TTL seconds."""
+        if settings.TEXT_CACHE_TTL <= 0:
+            return
+        try:
+            compressed = self._compressor.compress(text.encode("utf-8"))
+            await self.redis.set(self.KEY_PREFIX + key, compressed, ex=settings.TEXT_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Text cache write failed for {key}: {e}")
+
+
+text_cache = TextCache()
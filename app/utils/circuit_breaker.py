@@ -0,0 +1,86 @@
+"""
+Circuit breaker for calls to external services.
+"""
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker.
+    
+    Opens when more than failure_rate_threshold of the calls in the last
+    window seconds failed, so callers fail fast instead of waiting on a
+    broken service. After half_open_after seconds a single probe call is
+    let through: success closes the circuit, failure keeps it open.
+    """
+    
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        window: float = 60,
+        half_open_after: float = 30,
+        min_calls: int = 5,
+    ):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.window = window
+        self.half_open_after = half_open_after
+        self.min_calls = min_calls
+        self._calls: "deque[tuple]" = deque()  # (timestamp, ok)
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    def allow_request(self) -> bool:
+        """Check whether a call may go through (claims the probe when half-open)."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            
+            if self._probing or time.monotonic() - self._opened_at < self.half_open_after:
+                return False
+            
+            self._probing = True
+            return True
+    
+    def record(self, ok: bool) -> None:
+        """Record the outcome of a call that allow_request let through."""
+        now = time.monotonic()
+        with self._lock:
+            if self._probing:
+                self._probing = False
+                if ok:
+                    self._opened_at = None
+                    self._calls.clear()
+                    self._failures = 0
+                else:
+                    self._opened_at = now
+                return
+            
+            self._calls.append((now, ok))
+            if not ok:
+                self._failures += 1
+            
+            # Forget calls that fell out of the window
+            while self._calls and self._calls[0][0] <= now - self.window:
+                _, expired_ok = self._calls.popleft()
+                if not expired_ok:
+                    self._failures -= 1
+            
+            if (
+                self._opened_at is None
+                and len(self._calls) >= self.min_calls
+                and self._failures / len(self._calls) > self.failure_rate_threshold
+            ):
+                self._opened_at = now
+    
+    def release(self) -> None:
+        """
+        Give back a call that allow_request let through but that ended
+        without an outcome (it was cancelled), freeing the probe if half-open.
+        """
+        with self._lock:
+            self._probing = False
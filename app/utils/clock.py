@@ -0,0 +1,25 @@
+"""
+Request-scoped clock.
+"""
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+# Set once per request by RequestTimeMiddleware
+_request_now: ContextVar[Optional[datetime]] = ContextVar("request_now", default=None)
+
+
+def utc_now() -> datetime:
+    """
+    Get the current timezone-aware UTC time.
+    
+    Inside a request this is the time the request started, so every model
+    write in the same request shares one timestamp. Outside a request
+    (e.g. Celery tasks) it reads the system clock.
+    """
+    return _request_now.get() or datetime.now(timezone.utc)
+
+
+def set_request_now() -> None:
+    """Capture the current time for the running request."""
+    _request_now.set(datetime.now(timezone.utc))
@@ -69,6 +69,18 @@ class ValidationError(AppException):
         )
 
 
+class ConflictError(AppException):
+    """Conflicting concurrent request errors."""
+    
+    def __init__(self, message: str, details: Optional[Dict] = None):
+        super().__init__(
+            message=message,
+            status_code=409,
+            error_code="CONFLICT",
+            details=details,
+        )
+
+
 class FileUploadError(AppException):
     """File upload errors."""
     
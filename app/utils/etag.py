@@ -0,0 +1,36 @@
+"""
+HTTP ETag helpers for conditional GET responses.
+"""
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+
+
+def make_etag(body: bytes) -> str:
+    """Get a strong ETag for a response body."""
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def etag_response(request: Request, body: bytes, etag: Optional[str] = None) -> Response:
+    """
+    Build a JSON response carrying an ETag, or a bodiless 304 if the
+    client's If-None-Match already holds it.
+    
+    Args:
+        request: Incoming request
+        body: Encoded JSON body
+        etag: Precomputed ETag for body (computed if omitted)
+    
+    Returns:
+        200 response with body, or 304 response
+    """
+    etag = etag or make_etag(body)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}  # Always revalidate
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in client_etags or "*" in client_etags:
+            return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,42 +1,111 @@
 """
 Logging configuration and setup.
 """
+import atexit
+import copy
 import logging
+import logging.handlers
+import os
+import queue
 import sys
 from pathlib import Path
+import orjson
 from app.config import settings
 
+_LOG_TO_FILE = bool(settings.LOG_FILE and settings.LOG_TO_FILE)
+
 # Create logs directory if it doesn't exist
-Path("logs").mkdir(exist_ok=True)
+if _LOG_TO_FILE:
+    Path(settings.LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
 
 
-def setup_logger(name: str) -> logging.Logger:
-    """Setup logger with file and console handlers."""
-    logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
+class OrjsonFormatter(logging.Formatter):
+    """Format records as one-line JSON objects."""
     
-    # Prevent duplicate handlers
-    if logger.handlers:
-        return logger
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "lvl": record.levelname,
+            "name": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return orjson.dumps(entry).decode()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that keeps the traceback apart from the message."""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve everything that can't cross threads safely (args, exc_info)
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _build_handlers() -> list:
+    """Build the handlers that actually write records out."""
+    formatter = OrjsonFormatter()
     
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
-    console_format = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    console_handler.setFormatter(console_format)
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler]
     
     # File handler
-    file_handler = logging.FileHandler(settings.LOG_FILE)
-    file_handler.setLevel(logging.DEBUG)
-    file_format = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s"
-    )
-    file_handler.setFormatter(file_format)
+    if _LOG_TO_FILE:
+        file_handler = logging.FileHandler(settings.LOG_FILE)
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    
+    return handlers
+
+
+# Loggers only enqueue records; one background thread formats and writes
+# them, so logging never blocks the caller (or the event loop) on I/O
+_handlers = _build_handlers()
+_queue_handler = _QueueHandler(queue.SimpleQueue())
+_listener = logging.handlers.QueueListener(_queue_handler.queue, *_handlers, respect_handler_level=True)
+_listener.start()
+
+
+def _stop_listener() -> None:
+    """Flush queued records on exit."""
+    _listener.stop()
+
+
+def _restart_listener_in_child() -> None:
+    """Forked workers don't inherit the listener thread; start a fresh one."""
+    global _listener
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *_handlers, respect_handler_level=True)
+    _listener.start()
+
+
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
+
+def setup_logger(name: str) -> logging.Logger:
+    """Setup logger writing through the shared log queue."""
+    logger = logging.getLogger(name)
+    logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
+    # Handlers are attached here, so don't emit again through the root logger
+    logger.propagate = False
     
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # Prevent duplicate handlers
+    if logger.handlers:
+        return logger
     
+    logger.addHandler(_queue_handler)
     return logger
-
@@ -1,13 +1,58 @@
 """
 Security utilities for authentication and authorization.
 """
-from jose import jwt, JWTError
+import hashlib
+import time
+import jwt
+import orjson
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 
 from app.config import settings
+from app.utils.cache import TTLCache
 from app.utils.errors import AuthenticationError
 
+# Verified tokens: {blake2b(token): payload}, so repeated requests skip signature checks
+_verified_tokens = TTLCache(maxsize=10_000, ttl=settings.JWT_CACHE_TTL)
+
+# Rejected tokens: {blake2b(token): error message}, so retried bad tokens skip signature checks
+_rejected_tokens = TTLCache(maxsize=1024, ttl=30)
+
+# HMAC key and allowed algorithms, prepared once instead of per token
+_JWT_KEY = settings.SUPABASE_JWT_SECRET.encode("utf-8")
+_JWT_ALGORITHMS = [settings.ALGORITHM]
+
+# Upload limits, read from settings once
+_ALLOWED_EXTENSIONS = settings.allowed_file_extensions
+_MAX_FILE_SIZE = settings.max_file_size_bytes
+
+# Leading bytes of binary file types (docx is a zip container)
+_FILE_SIGNATURES = (
+    (b"%PDF-", "pdf"),
+    (b"PK\x03\x04", "docx"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "doc"),
+)
+
+# How many leading bytes detect_file_type needs
+FILE_HEADER_SIZE = 16
+
+
+class _OrjsonJWT(jwt.PyJWT):
+    """PyJWT decoder that parses token payloads with orjson."""
+    
+    def _decode_payload(self, decoded: Dict[str, Any]) -> Any:
+        try:
+            payload = orjson.loads(decoded["payload"])
+        except orjson.JSONDecodeError as e:
+            raise jwt.DecodeError(f"Invalid payload string: {e}")
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload string: must be a json object")
+        return payload
+
+
+# Shared decoder; PyJWT instances hold no per-token state
+_jwt = _OrjsonJWT()
+
 
 def decode_jwt_token(token: str) -> Dict[str, Any]:
     """
@@ -29,25 +74,22 @@ def decode_jwt_token(token: str) -> Dict[str, Any]:
     Raises:
         AuthenticationError: If token is invalid, expired, or missing
     """
+    return _verify_token(token.removeprefix("Bearer "))
+
+
+def _verify_token(token: str) -> Dict[str, Any]:
+    """Verify a JWT token already stripped of its 'Bearer ' prefix."""
+    if not token:
+        raise AuthenticationError("Token is empty")
+    
     try:
-        # Remove 'Bearer ' prefix if present
-        if token.startswith("Bearer "):
-            token = token[7:]
-        
-        if not token:
-            raise AuthenticationError("Token is empty")
-        
         # Decode and verify token (Supabase uses HS256)
-        payload = jwt.decode(
-            token,
-            settings.SUPABASE_JWT_SECRET,
-            algorithms=[settings.ALGORITHM],
-        )
+        payload = _jwt.decode(token, _JWT_KEY, algorithms=_JWT_ALGORITHMS)
         
         return payload
     except jwt.ExpiredSignatureError:
         raise AuthenticationError("Token has expired")
-    except jwt.JWTError as e:
+    except jwt.InvalidTokenError as e:
         raise AuthenticationError(f"Invalid token: {str(e)}")
     except Exception as e:
         raise AuthenticationError(f"Token verification failed: {str(e)}")
@@ -66,7 +108,7 @@ def get_user_id_from_token(token: str) -> str:
     Raises:
         AuthenticationError: If token is invalid or missing user ID
     """
-    payload = decode_jwt_token(token)
+    payload = get_token_payload(token)
     user_id = payload.get("sub") or payload.get("user_id")
     
     if not user_id:
@@ -79,7 +121,9 @@ def get_token_payload(token: str) -> Dict[str, Any]:
     """
     Get full token payload with all claims.
     
-    This is a convenience function that returns the complete decoded token payload.
+    Verified payloads are cached by token hash until the token expires
+    (at most JWT_CACHE_TTL seconds), and rejections for 30 seconds, so
+    repeated requests skip signature checks.
     
     Args:
         token: JWT token string (with or without 'Bearer ' prefix)
@@ -87,7 +131,27 @@ def get_token_payload(token: str) -> Dict[str, Any]:
     Returns:
         Complete token payload dictionary with all claims
     """
-    return decode_jwt_token(token)
+    token = token.removeprefix("Bearer ")
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = _verified_tokens.get(cache_key)
+    if payload is not None:
+        return payload
+    
+    rejection = _rejected_tokens.get(cache_key)
+    if rejection is not None:
+        raise AuthenticationError(rejection)
+    
+    try:
+        payload = _verify_token(token)
+    except AuthenticationError as e:
+        _rejected_tokens.set(cache_key, e.message)
+        raise
+    
+    # Never cache a token beyond its own expiration
+    exp = payload.get("exp")
+    _verified_tokens.set(cache_key, payload, ttl=exp - time.time() if exp else None)
+    
+    return payload
 
 
 def validate_file_type(filename: str) -> bool:
@@ -103,8 +167,8 @@ def validate_file_type(filename: str) -> bool:
     if not filename:
         return False
     
-    extension = filename.split(".")[-1].lower()
-    return extension in settings.allowed_file_extensions
+    extension = filename.rpartition(".")[2].lower()
+    return extension in _ALLOWED_EXTENSIONS
 
 
 def validate_file_size(file_size: int) -> bool:
@@ -117,5 +181,39 @@ def validate_file_size(file_size: int) -> bool:
     Returns:
         True if within limits, False otherwise
     """
-    return file_size <= settings.max_file_size_bytes
+    return file_size <= _MAX_FILE_SIZE
+
+
+def detect_file_type(header: bytes) -> Optional[str]:
+    """
+    Detect file type from its leading bytes.
+    
+    Args:
+        header: First FILE_HEADER_SIZE bytes of the file
+        
+    Returns:
+        Extension of the detected type, "txt" for text, or None if unknown
+    """
+    for signature, extension in _FILE_SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    
+    # Plain text never contains NUL bytes
+    if b"\x00" not in header:
+        return "txt"
+    return None
+
 
+def validate_file_signature(filename: str, header: bytes) -> bool:
+    """
+    Validate file contents match its extension.
+    
+    Args:
+        filename: File name with extension
+        header: First FILE_HEADER_SIZE bytes of the file
+        
+    Returns:
+        True if the contents match, False otherwise
+    """
+    extension = filename.rpartition(".")[2].lower()
+    return detect_file_type(header) == extension
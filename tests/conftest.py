@@ -2,19 +2,40 @@
 Pytest configuration and fixtures.
 """
 import pytest
+import pytest_asyncio
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
+from app.models.document import Document
 
-@pytest.fixture
-async def db():
-    """Get test database connection."""
-    client = AsyncIOMotorClient(settings.MONGODB_URL)
-    db = client[settings.MONGODB_DB_NAME + "_test"]
-    yield db
+TEST_DB_NAME = settings.MONGODB_DB_NAME + "_test"
+
+def pytest_collection_modifyitems(items):
+    """Run every async test in the session's event loop, the one mongo_client is bound to."""
+    session_loop = pytest.mark.asyncio(scope="session")
+    for item in items:
+        if pytest_asyncio.is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+@pytest_asyncio.fixture(scope="session")
+async def mongo_client():
+    """MongoDB client shared by the whole test session."""
+    client = AsyncIOMotorClient(settings.MONGODB_URL, maxPoolSize=10)
+    yield client
     # Cleanup
-    await client.drop_database(settings.MONGODB_DB_NAME + "_test")
+    await client.drop_database(TEST_DB_NAME)
     client.close()
 
+@pytest.fixture
+def db(mongo_client):
+    """Get test database connection."""
+    yield mongo_client[TEST_DB_NAME]
+    # Empty collections between tests (through the sync driver, so this
+    # fixture needs no event loop), keeping them and their indexes
+    sync_db = mongo_client.delegate[TEST_DB_NAME]
+    for name in sync_db.list_collection_names():
+        sync_db[name].delete_many({})
+
 @pytest.fixture
 def test_user_data():
     """Sample user data for testing."""
@@ -26,3 +47,27 @@ def test_user_data():
         "credits_remaining": 20,
     }
 
+
+@pytest.fixture
+def bulk_documents(db, test_user_data):
+    """Factory inserting n test documents with a single insert_many."""
+    async def create(n: int, **overrides) -> list:
+        documents = [
+            Document(**{
+                "user_id": test_user_data["user_id"],
+                "name": f"test-{i}.pdf",
+                "file_url": f"https://s3.../test-{i}.pdf",
+                "file_type": "pdf",
+                "file_size": 1024,
+                "document_type": "contract",
+                **overrides,
+            })
+            for i in range(n)
+        ]
+        await db.documents.insert_many(
+            [{"_id": ObjectId(document.document_id), **document.model_dump()} for document in documents],
+            ordered=False,
+        )
+        return documents
+    
+    return create
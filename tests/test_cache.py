@@ -0,0 +1,85 @@
+"""
+Tests for the in-process TTL cache.
+"""
+from types import SimpleNamespace
+import pytest
+from app.utils import cache as cache_module
+from app.utils.cache import TTLCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the cache's clock with one advanced by hand."""
+    fake = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: fake.now))
+    return fake
+
+def test_get_and_set(clock):
+    """Test caching and reading a value."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    
+    cache.set("key", {"value": 1})
+    
+    assert cache.get("key") == {"value": 1}
+    assert cache.get("missing") is None
+
+def test_entries_expire(clock):
+    """Test that entries are gone once their TTL passes."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("key", "value")
+    
+    clock.now += 59
+    assert cache.get("key") == "value"
+    
+    clock.now += 1
+    assert cache.get("key") is None
+
+def test_entry_ttl_is_capped(clock):
+    """Test that a per-entry TTL can shorten but never extend the cache TTL."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("short", "value", ttl=10)
+    cache.set("long", "value", ttl=600)
+    
+    clock.now += 10
+    assert cache.get("short") is None
+    assert cache.get("long") == "value"
+    
+    clock.now += 50
+    assert cache.get("long") is None
+
+def test_non_positive_ttl_is_not_cached(clock):
+    """Test that already-expired entries aren't stored."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    
+    cache.set("key", "value", ttl=0)
+    cache.set("other", "value", ttl=-5)
+    
+    assert cache.get("key") is None
+    assert cache.get("other") is None
+
+def test_evicts_least_recently_used(clock):
+    """Test that the least recently read entry is evicted first."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    
+    # Reading a makes b the least recently used
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+def test_pop_and_clear(clock):
+    """Test removing one entry and all entries."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    
+    cache.pop("a")
+    cache.pop("missing")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    
+    cache.clear()
+    assert cache.get("b") is None
@@ -0,0 +1,92 @@
+"""
+Tests for document chunking.
+"""
+import pytest
+import tiktoken
+from app.services import chunker as chunker_module
+from app.services.chunker import DocumentChunker
+
+# One token per byte, so token counts are predictable without downloading
+# a real model encoding
+BYTE_ENCODING = tiktoken.Encoding(
+    "bytes",
+    pat_str=r"\S+|\s+",
+    mergeable_ranks={bytes([i]): i for i in range(256)},
+    special_tokens={},
+)
+
+@pytest.fixture
+def chunker(monkeypatch):
+    """Chunker with a 1000-token limit over the byte encoding."""
+    monkeypatch.setattr(chunker_module, "_get_encoding", lambda model: BYTE_ENCODING)
+    return DocumentChunker(max_tokens=1000)
+
+def test_empty_text(chunker):
+    """Test that blank text gives no chunks."""
+    assert chunker.chunk_text("") == []
+    assert chunker.chunk_text(" \n\n ") == []
+
+def test_short_text_is_one_chunk(chunker):
+    """Test that text within the limit is returned whole."""
+    chunks = chunker.chunk_text("A short contract.", overlap=0)
+    
+    assert len(chunks) == 1
+    assert chunks[0]["chunk_index"] == 0
+    assert chunks[0]["text"] == "A short contract."
+    assert chunks[0]["token_count"] == len("A short contract.")
+
+def test_paragraphs_are_kept_whole(chunker):
+    """Test that chunks break between paragraphs and are filled greedily."""
+    paragraphs = [f"Paragraph {i}. " + "word " * 58 for i in range(10)]
+    text = "\n\n".join(paragraph.strip() for paragraph in paragraphs)
+    
+    chunks = chunker.chunk_text(text, overlap=0)
+    
+    # Three ~300-token paragraphs fit in each 1000-token chunk
+    assert len(chunks) == 4
+    assert [chunk["chunk_index"] for chunk in chunks] == [0, 1, 2, 3]
+    for chunk in chunks:
+        assert chunk["token_count"] <= 1000
+    for paragraph in paragraphs:
+        assert sum(paragraph.strip() in chunk["text"] for chunk in chunks) == 1
+
+def test_long_paragraph_splits_on_sentences(chunker):
+    """Test that an oversized paragraph splits after sentences, not after initials."""
+    text = "The U.S. court ruled. " * 100
+    
+    chunks = chunker.chunk_text(text, overlap=0)
+    
+    assert len(chunks) == 3
+    for chunk in chunks:
+        assert chunk["token_count"] <= 1000
+        assert chunk["text"].startswith("The U.S. court")
+        assert chunk["text"].endswith("court ruled.")
+
+def test_text_without_separators_is_cut_by_tokens(chunker):
+    """Test that text with no natural boundary is cut on token boundaries."""
+    chunks = chunker.chunk_text("x" * 2500, overlap=0)
+    
+    assert [chunk["token_count"] for chunk in chunks] == [1000, 1000, 500]
+    assert "".join(chunk["text"] for chunk in chunks) == "x" * 2500
+
+def test_overlap_repeats_end_of_previous_chunk(chunker):
+    """Test that each chunk starts with the last overlap tokens of the one before."""
+    text = "\n\n".join(f"Clause {i}: " + "term " * 90 for i in range(10))
+    
+    chunks = chunker.chunk_text(text, overlap=50)
+    
+    assert len(chunks) > 1
+    for previous, chunk in zip(chunks, chunks[1:]):
+        tail = previous["text"][-40:]
+        assert tail in chunk["text"][:60]
+        # Room is left for the overlap, so chunks stay within the limit
+        assert chunk["token_count"] <= 1000
+
+def test_tiny_last_chunk_is_merged(chunker):
+    """Test that a chunk below MIN_CHUNK_TOKENS folds into its neighbor."""
+    text = "a" * 990 + "\n\nSigned."
+    
+    chunks = chunker.chunk_text(text, overlap=0)
+    
+    assert len(chunks) == 1
+    assert chunks[0]["text"].endswith("Signed.")
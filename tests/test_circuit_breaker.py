@@ -0,0 +1,98 @@
+"""
+Tests for the circuit breaker.
+"""
+from types import SimpleNamespace
+import pytest
+from app.utils import circuit_breaker as circuit_breaker_module
+from app.utils.circuit_breaker import CircuitBreaker
+
+class FakeClock:
+    """Monotonic clock advanced by hand."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the breaker's clock with a FakeClock."""
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker_module, "time", SimpleNamespace(monotonic=fake.monotonic))
+    return fake
+
+def _fail(breaker: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        assert breaker.allow_request()
+        breaker.record(False)
+
+def test_stays_closed_below_min_calls(clock):
+    """Test that a few failures don't open the circuit."""
+    breaker = CircuitBreaker(min_calls=5)
+    
+    _fail(breaker, 4)
+    
+    assert breaker.allow_request()
+
+def test_opens_on_high_failure_rate(clock):
+    """Test that the circuit opens once most recent calls failed."""
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, min_calls=5)
+    
+    breaker.record(True)
+    breaker.record(True)
+    _fail(breaker, 3)
+    
+    assert not breaker.allow_request()
+
+def test_failures_expire_from_window(clock):
+    """Test that failures older than the window no longer count."""
+    breaker = CircuitBreaker(window=60, min_calls=5)
+    
+    _fail(breaker, 4)
+    clock.now += 61
+    breaker.record(False)
+    
+    assert breaker.allow_request()
+
+def test_half_open_probe_success_closes(clock):
+    """Test that a successful probe after half_open_after closes the circuit."""
+    breaker = CircuitBreaker(half_open_after=30, min_calls=5)
+    _fail(breaker, 5)
+    
+    clock.now += 29
+    assert not breaker.allow_request()
+    
+    clock.now += 2
+    assert breaker.allow_request()
+    # Only one probe at a time
+    assert not breaker.allow_request()
+    
+    breaker.record(True)
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+
+def test_half_open_probe_failure_reopens(clock):
+    """Test that a failed probe keeps the circuit open for another half_open_after."""
+    breaker = CircuitBreaker(half_open_after=30, min_calls=5)
+    _fail(breaker, 5)
+    
+    clock.now += 31
+    assert breaker.allow_request()
+    breaker.record(False)
+    
+    assert not breaker.allow_request()
+    clock.now += 31
+    assert breaker.allow_request()
+
+def test_release_frees_probe(clock):
+    """Test that a cancelled probe lets the next call probe instead."""
+    breaker = CircuitBreaker(half_open_after=30, min_calls=5)
+    _fail(breaker, 5)
+    clock.now += 31
+    assert breaker.allow_request()
+    
+    breaker.release()
+    
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
@@ -0,0 +1,30 @@
+"""
+Tests for file type detection.
+"""
+from app.utils.security import detect_file_type, validate_file_signature
+
+def test_detect_binary_types():
+    """Test detecting files by their leading bytes."""
+    assert detect_file_type(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n") == "pdf"
+    assert detect_file_type(b"PK\x03\x04\x14\x00\x06\x00\x08\x00\x00\x00!\x00") == "docx"
+    assert detect_file_type(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1\x00\x00\x00\x00") == "doc"
+
+def test_detect_text():
+    """Test that content without NUL bytes counts as text."""
+    assert detect_file_type(b"EMPLOYMENT AGREE") == "txt"
+    assert detect_file_type("Vertrag über".encode()) == "txt"
+    assert detect_file_type(b"") == "txt"
+
+def test_detect_unknown_binary():
+    """Test that unrecognized binary content isn't detected."""
+    assert detect_file_type(b"MZ\x90\x00\x03\x00\x00\x00\x04\x00\x00\x00") is None
+    assert detect_file_type(b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR") is None
+
+def test_validate_file_signature():
+    """Test that contents must match the file's extension."""
+    assert validate_file_signature("contract.pdf", b"%PDF-1.4")
+    assert validate_file_signature("Contract.PDF", b"%PDF-1.4")
+    assert validate_file_signature("notes.txt", b"Plain text")
+    assert not validate_file_signature("contract.pdf", b"PK\x03\x04")
+    assert not validate_file_signature("contract.pdf", b"Plain text")
+    assert not validate_file_signature("contract.docx", b"MZ\x90\x00")
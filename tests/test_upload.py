@@ -2,7 +2,7 @@
 Tests for document upload functionality.
 """
 import pytest
-from app.models.document import Document
+from app.models.document import Document, DocumentStatus
 from app.models.user import User
 
 @pytest.mark.asyncio
@@ -27,3 +27,41 @@ async def test_document_creation(db, test_user_data):
     assert document.name == "test.pdf"
     assert document.user_id == user.user_id
 
+
+@pytest.mark.asyncio
+async def test_document_listing(db, bulk_documents, test_user_data):
+    """Test listing a user's documents."""
+    await bulk_documents(3)
+    
+    documents, total = await Document.list_brief_and_count_by_user(db, test_user_data["user_id"])
+    
+    assert total == 3
+    assert len(documents) == 3
+
+@pytest.mark.asyncio
+async def test_claim_status_only_once(db, bulk_documents, test_user_data):
+    """Test that only one caller can claim an uploading document."""
+    [document] = await bulk_documents(1, status=DocumentStatus.UPLOADING)
+    not_uploading = [status for status in DocumentStatus if status != DocumentStatus.UPLOADING]
+    
+    claimed = await Document.claim_status(
+        db, document.document_id, test_user_data["user_id"], DocumentStatus.UPLOADED, unless_status=not_uploading
+    )
+    again = await Document.claim_status(
+        db, document.document_id, test_user_data["user_id"], DocumentStatus.UPLOADED, unless_status=not_uploading
+    )
+    
+    assert claimed is not None
+    assert claimed.status == DocumentStatus.UPLOADED
+    assert again is None
+
+@pytest.mark.asyncio
+async def test_claim_status_checks_owner(db, bulk_documents):
+    """Test that another user's document can't be claimed."""
+    [document] = await bulk_documents(1, status=DocumentStatus.UPLOADING)
+    
+    claimed = await Document.claim_status(
+        db, document.document_id, "someone-else", DocumentStatus.UPLOADED, unless_status=[DocumentStatus.UPLOADED]
+    )
+    
+    assert claimed is None